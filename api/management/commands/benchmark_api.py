@@ -0,0 +1,94 @@
+import json
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from posts import loadtest, seeding
+from posts.models import Group, Post, User
+
+# поля списка без текста и картинок
+POST_FIELDS = 'id,pub_date,author,url'
+COMMENT_FIELDS = 'id,created,author'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время ответа и размер JSON API со страницами сайта '
+        'для тех же лент на временной базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Запросов к каждому адресу',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, posts, comments, requests, seed, **options):
+        with seeding.temporary_database():
+            sizes = seeding.seed(posts=posts, comments=comments,
+                                 random_seed=seed)
+            reader = User.objects.order_by('-stats__following').first()
+            self.visitor = loadtest.Visitor(reader)
+            self.client = Client(REMOTE_ADDR=loadtest.REMOTE_ADDR)
+            self.client.force_login(reader)
+            feeds = {
+                name: {
+                    'html': self.measure(html, {}, requests),
+                    'json': self.measure(api, params, requests),
+                    'json_sparse': self.measure(
+                        api, {**params, 'fields': fields}, requests
+                    ),
+                }
+                for name, html, api, params, fields in self.feeds()
+            }
+        report = {'dataset': sizes, 'requests': requests, 'feeds': feeds}
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def feeds(self):
+        """Имя ленты, адрес страницы сайта, адрес и параметры API
+        и поля для выборочного ответа.
+        """
+        author = User.objects.order_by('-stats__posts').first().username
+        slug = Group.objects.order_by('pk').first().slug
+        post = Post.objects.filter(
+            comments__isnull=False
+        ).select_related('author').order_by('pk').first()
+        return [
+            ('index', '/', '/api/v1/posts/', {}, POST_FIELDS),
+            ('follow', '/follow/', '/api/v1/follow/', {}, POST_FIELDS),
+            ('group', f'/group/{slug}/', f'/api/v1/groups/{slug}/posts/',
+             {}, POST_FIELDS),
+            ('profile', f'/{author}/', f'/api/v1/users/{author}/posts/',
+             {}, POST_FIELDS),
+            (
+                'comments',
+                f'/{post.author.username}/{post.pk}/',
+                f'/api/v1/users/{post.author.username}/posts/{post.pk}/'
+                'comments/',
+                # столько же комментариев, сколько на странице записи
+                {'limit': settings.COMMENTS_PER_PAGE},
+                COMMENT_FIELDS,
+            ),
+        ]
+
+    def measure(self, path, params, requests):
+        response = self.client.get(path, params)
+        if response.streaming:
+            body = b''.join(response.streaming_content)
+        else:
+            body = response.content
+        timings = [
+            self.visitor.request('GET', path, params)[0]
+            for _ in range(requests)
+        ]
+        return {
+            'status': response.status_code,
+            'bytes': len(body),
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(loadtest.percentile(timings, 95), 2),
+        }
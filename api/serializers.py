@@ -0,0 +1,89 @@
+"""Поля записей и комментариев в ответах API.
+
+Клиент выбирает поля параметром `?fields=id,author,text`. Колонки
+и связанные таблицы невыбранных полей не читаются из базы.
+"""
+from django.urls import reverse
+
+
+class UnknownField(ValueError):
+    pass
+
+
+class Fields:
+    """Набор полей ответа.
+
+    `getters` - функции, достающие значение поля из объекта, `columns` -
+    колонки модели, нужные только этому полю, `related` - связанные
+    таблицы, которые для поля читаются тем же запросом.
+    """
+
+    def __init__(self, getters, columns=None, related=None):
+        self.getters = getters
+        self.columns = columns or {}
+        self.related = related or {}
+
+    def parse(self, value):
+        """Поля из параметра запроса, без параметра - все."""
+        if not value:
+            return tuple(self.getters)
+        names = tuple(dict.fromkeys(
+            name.strip() for name in value.split(',') if name.strip()
+        ))
+        unknown = [name for name in names if name not in self.getters]
+        if unknown or not names:
+            raise UnknownField(', '.join(unknown))
+        return names
+
+    def prepare(self, queryset, names):
+        """Запрос, читающий только нужное выбранным полям."""
+        deferred = [
+            column for name, columns in self.columns.items()
+            if name not in names for column in columns
+        ]
+        related = {
+            table for name in names for table in self.related.get(name, ())
+        }
+        queryset = queryset.select_related(None).defer(*deferred)
+        # select_related() без аргументов читает все связи
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        return queryset
+
+    def serialize(self, obj, names):
+        return {name: self.getters[name](obj) for name in names}
+
+
+def _image(post):
+    if not post.image:
+        return None
+    return {'url': post.image.url, 'sources': post.image_sources()}
+
+
+POST_FIELDS = Fields(
+    {
+        'id': lambda post: post.pk,
+        'pub_date': lambda post: post.pub_date,
+        'author': lambda post: post.author.username,
+        'group': lambda post: post.group.slug if post.group_id else None,
+        'text': lambda post: post.text,
+        'image': _image,
+        'comments_count': lambda post: post.comments_count,
+        'url': lambda post: reverse(
+            'post', args=(post.author.username, post.pk)
+        ),
+    },
+    columns={'text': ('text',), 'image': ('image', 'image_variants')},
+    related={'author': ('author',), 'group': ('group',), 'url': ('author',)},
+)
+
+COMMENT_FIELDS = Fields(
+    {
+        'id': lambda comment: comment.pk,
+        'created': lambda comment: comment.created,
+        'author': lambda comment: comment.author.username,
+        'text': lambda comment: comment.text,
+    },
+    columns={'text': ('text',)},
+    related={'author': ('author',)},
+)
@@ -0,0 +1,161 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='title group',
+            slug='test-slug',
+            description='description group'
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f'Запись {number}', author=self.author,
+                group=self.group,
+            )
+            for number in range(5)
+        ]
+        self.post = self.posts[-1]
+        for number in range(3):
+            Comment.objects.create(
+                post=self.post, author=self.reader, text=f'Ответ {number}'
+            )
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, url, client=None, **params):
+        response = (client or self.guest_client).get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def walk(self, url, client=None, **params):
+        '''Все страницы ленты по ссылкам next.'''
+        data = self.get(url, client, **params)
+        results = data['results']
+        while data['next']:
+            data = self.get(data['next'], client)
+            results += data['results']
+        return results
+
+    def test_feeds(self):
+        '''Ленты отдают те же записи, что и страницы сайта.'''
+        expected = [post.pk for post in reversed(self.posts)]
+        urls = (
+            reverse('api:index'),
+            reverse('api:group', args=(self.group.slug,)),
+            reverse('api:profile', args=(self.author.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                results = self.walk(url, limit=2)
+                self.assertEqual([post['id'] for post in results], expected)
+        self.assertEqual(results[0], {
+            'id': self.post.pk,
+            'pub_date': results[0]['pub_date'],
+            'author': 'author',
+            'group': 'test-slug',
+            'text': 'Запись 4',
+            'image': None,
+            'comments_count': 3,
+            'url': reverse('post', args=('author', self.post.pk)),
+        })
+
+    def test_previous(self):
+        '''Ссылка previous возвращает на предыдущую страницу.'''
+        first = self.get(reverse('api:index'), limit=2)
+        second = self.get(first['next'])
+        self.assertEqual(self.get(second['previous'])['results'],
+                         first['results'])
+
+    def test_follow_feed(self):
+        '''Лента подписок доступна только авторизованному клиенту.'''
+        response = self.guest_client.get(reverse('api:follow_index'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            self.get(reverse('api:follow_index'), self.reader_client)[
+                'results'
+            ],
+            []
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        results = self.walk(reverse('api:follow_index'), self.reader_client,
+                            limit=2)
+        self.assertEqual(len(results), len(self.posts))
+
+    def test_comments(self):
+        '''Комментарии записи отдаются от новых к старым.'''
+        url = reverse('api:comments', args=('author', self.post.pk))
+        results = self.walk(url, limit=2, fields='author,text')
+        self.assertEqual(results, [
+            {'author': 'reader', 'text': f'Ответ {number}'}
+            for number in (2, 1, 0)
+        ])
+        response = self.guest_client.get(
+            reverse('api:comments', args=('reader', self.post.pk))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_sparse_fields(self):
+        '''Невыбранные поля не читаются из базы.'''
+        with CaptureQueriesContext(connection) as queries:
+            results = self.get(reverse('api:index'), fields='id,pub_date')[
+                'results'
+            ]
+        self.assertEqual(set(results[0]), {'id', 'pub_date'})
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_queries(self):
+        '''Страница ленты читается одним запросом записей.'''
+        with self.assertNumQueries(1):
+            self.get(reverse('api:index'))
+        with self.assertNumQueries(2):
+            self.get(reverse('api:group', args=(self.group.slug,)))
+
+    def test_bad_requests(self):
+        '''Неверные параметры дают ответ 400 с описанием ошибки.'''
+        url = reverse('api:index')
+        for params in (
+            {'fields': 'id,password'},
+            {'fields': ','},
+            {'limit': 'много'},
+            {'limit': 0},
+            {'limit': 1000},
+            {'cursor': 'garbage'},
+        ):
+            with self.subTest(params=params):
+                response = self.guest_client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+        response = self.guest_client.get(
+            reverse('api:group', args=('missing',))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_modified(self):
+        '''Неизменившаяся лента отдаётся ответом 304.'''
+        url = reverse('api:index')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новая', author=self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,25 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.Index.as_view(), name='index'),
+    path('follow/', views.FollowIndex.as_view(), name='follow_index'),
+    path(
+        'groups/<slug:slug>/posts/',
+        views.GroupPosts.as_view(),
+        name='group'
+    ),
+    path(
+        'users/<str:username>/posts/',
+        views.Profile.as_view(),
+        name='profile'
+    ),
+    path(
+        'users/<str:username>/posts/<int:pk>/comments/',
+        views.Comments.as_view(),
+        name='comments'
+    ),
+]
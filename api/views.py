@@ -0,0 +1,146 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+from django.views import View
+
+from posts import caching, timeline
+from posts.models import Group, Post, User
+from posts.pagination import CursorPaginator, InvalidCursor
+from yatube.routers import read_from_replica
+
+from .serializers import COMMENT_FIELDS, POST_FIELDS, UnknownField
+
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+def error(status, message):
+    return JsonResponse({'error': message}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def login_required(view):
+    """Анонимному клиенту - 401 вместо перехода на страницу входа."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error(401, 'Нужна авторизация')
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class FeedView(View):
+    """Страница ленты в JSON с пагинацией по курсору.
+
+    Параметры: `cursor` - курсор из `next` или `previous` прошлого
+    ответа, `limit` - число объектов на странице, `fields` - поля
+    объектов через запятую. Объекты ленты отдаёт `get_queryset`
+    представления ленты.
+    """
+    fields = POST_FIELDS
+    ordering = ('-pub_date', '-pk')
+
+    def get(self, request, *args, **kwargs):
+        try:
+            names = self.fields.parse(request.GET.get('fields'))
+        except UnknownField as unknown:
+            return error(400, f'Неизвестные поля: {unknown}')
+        try:
+            limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+        except ValueError:
+            return error(400, 'limit должен быть числом')
+        if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+            return error(
+                400, f'limit от 1 до {settings.API_MAX_PAGE_SIZE}'
+            )
+        try:
+            queryset = self.fields.prepare(self.get_queryset(), names)
+        except Http404:
+            return error(404, 'Не найдено')
+        paginator = CursorPaginator(queryset, limit, self.ordering)
+        try:
+            page = paginator.page(request.GET.get('cursor'))
+        except InvalidCursor:
+            return error(400, 'Неверный курсор')
+        return StreamingHttpResponse(
+            self.stream(page, names), content_type='application/json'
+        )
+
+    def link(self, cursor):
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query['cursor'] = cursor
+        return f'{self.request.path}?{urlencode(query, doseq=True)}'
+
+    def stream(self, page, names):
+        """Ответ по частям: объекты сериализуются по одному."""
+        yield '{{"next": {}, "previous": {}, "results": ['.format(
+            encoder.encode(self.link(page.next_cursor)),
+            encoder.encode(self.link(page.previous_cursor)),
+        )
+        for number, obj in enumerate(page.object_list):
+            chunk = encoder.encode(self.fields.serialize(obj, names))
+            yield f',{chunk}' if number else chunk
+        yield ']}'
+
+
+@read_from_replica
+@method_decorator(
+    caching.conditional_page(caching.feed_tags), name='dispatch'
+)
+class Index(FeedView):
+    def get_queryset(self):
+        return Post.objects.for_feed()
+
+
+@read_from_replica
+@method_decorator(login_required, name='dispatch')
+@method_decorator(
+    caching.conditional_page(caching.feed_tags), name='dispatch'
+)
+class FollowIndex(FeedView):
+    ordering = ('-feed_date', '-feed_pk')
+
+    def get_queryset(self):
+        return timeline.feed(self.request.user).for_feed()
+
+
+@read_from_replica
+@method_decorator(
+    caching.conditional_page(caching.group_tags), name='dispatch'
+)
+class GroupPosts(FeedView):
+    def get_queryset(self):
+        group = get_object_or_404(Group, slug=self.kwargs['slug'])
+        return Post.objects.for_feed().filter(group=group)
+
+
+@read_from_replica
+@method_decorator(
+    caching.conditional_page(caching.profile_tags), name='dispatch'
+)
+class Profile(FeedView):
+    def get_queryset(self):
+        author = get_object_or_404(User, username=self.kwargs['username'])
+        return Post.objects.for_feed().filter(author=author)
+
+
+@read_from_replica
+@method_decorator(
+    caching.conditional_page(caching.post_tags), name='dispatch'
+)
+class Comments(FeedView):
+    fields = COMMENT_FIELDS
+    ordering = ('-created', '-pk')
+
+    def get_queryset(self):
+        post = get_object_or_404(
+            Post, pk=self.kwargs['pk'],
+            author__username=self.kwargs['username'],
+        )
+        return post.comments.select_related('author')
@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def thumbnails_inline(settings):
+    # потоки пула миниатюр и тестовая база SQLite в памяти блокируют
+    # друг друга, поэтому в тестах копии создаются в потоке запроса
+    settings.THUMBNAIL_WORKERS = 0
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(settings, tmp_path):
+    # кэш в файлах переживает тестовую базу, каждый тест получает свой
+    settings.CACHES = {
+        **settings.CACHES,
+        'default': {**settings.CACHES['default'], 'LOCATION': str(tmp_path)},
+    }
@@ -5,7 +5,7 @@ from .models import Comment, Follow, Group, Post
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
-    search_fields = ('text', 'title', 'group')
+    search_fields = ('text', 'group__title', 'author__username')
     list_filter = ('pub_date', 'author', 'group')
     empty_value_display = '-пусто-'
 
@@ -0,0 +1,265 @@
+"""Версии кэша по тегам.
+
+Закэшированный фрагмент или страница включают в ключ версии тегов,
+от которых зависят. Изменение данных выдаёт тегу новую версию, и старые
+ключи просто перестают читаться. Пропавшая из кэша версия тоже выдаётся
+заново, поэтому вытеснение не приводит к показу устаревших данных.
+
+Теги карточек записей строятся по id: `post:<pk>`, `user:<pk>`,
+`group:<pk>`. Теги страниц строятся по аргументам URL, чтобы ключ
+находился до обращения к базе: `feed`, `group-page:<slug>`,
+`profile:<username>` и тот же `post:<pk>`. Из тех же версий и версий
+тегов пользователя (`follows:<pk>` - его подписки) строится ETag
+страницы для условных запросов.
+
+Версии должны быть общими для всех процессов сервера, иначе сброс
+в одном процессе не виден остальным, и они отдают устаревшие страницы
+и 304. Поэтому с кэшем в памяти процесса (LocMemCache) кэш страниц,
+фрагментов и ETag не включаются.
+
+Версия помнит время выдачи. Реплика может ещё не получить изменение,
+выдавшее версию, поэтому страница, прочитанная с реплики раньше чем
+через DATABASE_PIN_SECONDS после выдачи версии, не кэшируется и не
+получает ETag: иначе старые данные закрепились бы под новой версией.
+"""
+import hashlib
+import time
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+
+from yatube.routers import reads_replica
+
+
+def is_shared():
+    """Виден ли кэш всем процессам сервера."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def _key(tag):
+    return f'tag-version:{tag}'
+
+
+def _new_version():
+    return '{:x}-{}'.format(int(time.time()), uuid4().hex[:8])
+
+
+def _issued_at(version):
+    stamp, dash, _ = version.partition('-')
+    # версии без времени выдачи выданы до того, как его стали хранить
+    return int(stamp, 16) if dash else 0
+
+
+def _replica_may_lag(versions):
+    """Прочитаны ли данные с реплики, которая может ещё не знать
+    об изменении, выдавшем одну из версий."""
+    if not reads_replica():
+        return False
+    since = time.time() - settings.DATABASE_PIN_SECONDS
+    return any(_issued_at(version) > since for version in versions)
+
+
+def get_versions(tags):
+    keys = [_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _bump(tags):
+    cache.set_many({_key(tag): _new_version() for tag in tags}, timeout=None)
+
+
+def invalidate(*tags):
+    _bump(tags)
+    # до коммита читатели видят старые данные и могут закэшировать их
+    # под новой версией, поэтому после коммита версия меняется ещё раз
+    transaction.on_commit(lambda: _bump(tags))
+
+
+def card_tags(post):
+    tags = [f'post:{post.pk}', f'user:{post.author_id}']
+    if post.group_id:
+        tags.append(f'group:{post.group_id}')
+    return tags
+
+
+def set_card_versions(posts):
+    """Проставляет карточкам записей версию для кэша фрагментов."""
+    if not is_shared():
+        # без версии карточка строится без кэша
+        return
+    posts = list(posts)
+    tags = list({tag for post in posts for tag in card_tags(post)})
+    versions = dict(zip(tags, get_versions(tags)))
+    for post in posts:
+        post.card_version = '.'.join(
+            [str(post.pub_date.timestamp())]
+            + [versions[tag] for tag in card_tags(post)]
+        )
+
+
+def feed_tags(**kwargs):
+    return ['feed']
+
+
+def group_tags(slug, **kwargs):
+    return [f'group-page:{slug}']
+
+
+def profile_tags(username, **kwargs):
+    return [f'profile:{username}']
+
+
+def post_tags(username, pk, **kwargs):
+    return [f'post:{pk}', f'profile:{username}']
+
+
+# подсказки «на кого подписаться», пересчитанные для всех сразу
+SUGGESTIONS_TAG = 'suggestions'
+
+
+def viewer_tags(user_id):
+    """Теги того, что видит на страницах авторизованный пользователь."""
+    # имя пользователя в меню, его подписки в ленте подписок
+    # и подсказки, которые меняются вместе с подписками
+    return [f'user:{user_id}', f'follows:{user_id}', SUGGESTIONS_TAG]
+
+
+def _page_key(request, versions):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return 'page:{}:{}'.format(url, '.'.join(versions))
+
+
+def _cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.cookies
+        # страница с csrf-токеном у каждого посетителя своя
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def _store_streamed(response, content, key):
+    """Содержимое потокового ответа, которое по окончании кэшируется."""
+    chunks = []
+    for chunk in content:
+        chunks.append(chunk)
+        yield chunk
+    # ответ, прерванный на середине, сюда не доходит и не кэшируется
+    cached = HttpResponse(b''.join(chunks), status=response.status_code)
+    for header, value in response.items():
+        cached[header] = value
+    cache.set(key, cached, settings.PAGE_CACHE_TIMEOUT)
+
+
+def cache_anonymous_page(tags):
+    """Кэширует страницу для анонимных посетителей.
+
+    `tags` получает аргументы URL и возвращает теги, от которых зависит
+    страница. Авторизованным пользователям страница строится заново.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated
+                    or not is_shared()):
+                return view(request, *args, **kwargs)
+            versions = get_versions(tags(**kwargs))
+            key = _page_key(request, versions)
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+
+                def store(response):
+                    if (not _cacheable(request, response)
+                            or _replica_may_lag(versions)):
+                        return
+                    if response.streaming:
+                        response.streaming_content = _store_streamed(
+                            response, response.streaming_content, key
+                        )
+                    else:
+                        cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+
+                if hasattr(response, 'render') and callable(response.render):
+                    response.add_post_render_callback(store)
+                else:
+                    store(response)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def _csrf_secret(request):
+    # токен выдаётся заранее, чтобы первый ответ с формой и следующий
+    # запрос с полученной кукой давали один и тот же ETag
+    get_token(request)
+    return request.META['CSRF_COOKIE']
+
+
+def _versions(request, tags):
+    versions = get_versions(tags)
+    if request.user.is_authenticated:
+        # меню, лента подписок и подсказки у каждого пользователя свои
+        versions += get_versions(viewer_tags(request.user.pk))
+    return versions
+
+
+def _etag(request, versions):
+    parts = [request.get_full_path(), *versions]
+    user = request.user
+    if user.is_authenticated:
+        # csrf-токен в разметке у каждого пользователя свой
+        parts += [str(user.pk), _csrf_secret(request)]
+    digest = hashlib.md5('\n'.join(parts).encode()).hexdigest()
+    # слабый: токены csrf в разметке меняются от показа к показу
+    return f'W/"{digest}"'
+
+
+def conditional_page(tags):
+    """Отвечает 304, если страница не менялась с прошлого запроса.
+
+    ETag строится из версий тегов страницы и пользователя, поэтому
+    совпавший If-None-Match не доходит ни до представления, ни до базы.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not is_shared():
+                return view(request, *args, **kwargs)
+            versions = _versions(request, tags(**kwargs))
+            etag = _etag(request, versions)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if _replica_may_lag(versions):
+                    # страница может быть старше версий
+                    etag = None
+            if response.status_code in (200, 304):
+                if etag is not None:
+                    response['ETag'] = etag
+                # клиент и прокси переспрашивают страницу каждый раз
+                patch_cache_control(
+                    response,
+                    no_cache=True,
+                    private=request.user.is_authenticated,
+                )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+"""Ленты Atom и RSS записей сайта, группы и автора.
+
+В ленте не больше FEED_SIZE последних записей, запрос читает их
+по индексу ленты сайта, группы или автора. XML ленты отдаётся
+по частям, по одной записи, и целиком в памяти не собирается.
+"""
+from io import BytesIO
+from textwrap import shorten
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+from django.utils.html import linebreaks
+from django.utils.xmlutils import SimplerXMLGenerator
+
+
+def _take(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+class StreamingFeedMixin:
+    """Генератор ленты, отдающий её по частям.
+
+    Записи передаются итерируемым `entries` из словарей аргументов
+    add_item и не хранятся в ленте. Дата обновления ленты передаётся
+    в `updated`: без записей в памяти её не вычислить. Начало и конец
+    документа пишут `open` и `close` генератора конкретного формата.
+    """
+    # элемент одной записи
+    entry_element = None
+
+    def __init__(self, *args, entries=(), updated=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.entries = entries
+        self.updated = updated
+
+    def latest_post_date(self):
+        return self.updated or timezone.now()
+
+    def stream(self, encoding='utf-8'):
+        buffer = BytesIO()
+        handler = SimplerXMLGenerator(buffer, encoding)
+        handler.startDocument()
+        self.open(handler)
+        yield _take(buffer)
+        for entry in self.entries:
+            # add_item приводит поля к виду, который ждёт генератор
+            self.add_item(**entry)
+            item = self.items.pop()
+            handler.startElement(
+                self.entry_element, self.item_attributes(item)
+            )
+            self.add_item_elements(handler, item)
+            handler.endElement(self.entry_element)
+            yield _take(buffer)
+        self.close(handler)
+        yield _take(buffer)
+
+
+class AtomFeed(StreamingFeedMixin, feedgenerator.Atom1Feed):
+    entry_element = 'entry'
+
+    def open(self, handler):
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def close(self, handler):
+        handler.endElement('feed')
+
+
+class RssFeed(StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    entry_element = 'item'
+
+    def open(self, handler):
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def close(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+FORMATS = {'atom': AtomFeed, 'rss': RssFeed}
+
+
+def _entry(request, post):
+    link = request.build_absolute_uri(
+        reverse('post', args=(post.author.username, post.pk))
+    )
+    return {
+        'title': shorten(post.text, 80, placeholder='...'),
+        'link': link,
+        'unique_id': link,
+        # описание читается как HTML, текст записи экранируется
+        'description': linebreaks(post.text, autoescape=True),
+        'author_name': post.author.username,
+        'author_link': request.build_absolute_uri(
+            reverse('profile', args=(post.author.username,))
+        ),
+        'pubdate': post.pub_date,
+        'categories': [post.group.title] if post.group_id else (),
+    }
+
+
+def response(request, kind, posts, title, link, description=''):
+    """Потоковый ответ с лентой `kind` из последних записей `posts`."""
+    if kind not in FORMATS:
+        raise Http404(kind)
+    # записи читаются в представлении: запрос идёт к реплике, а соединение
+    # с базой не остаётся открытым, пока клиент медленно читает ответ
+    posts = list(posts.select_related('author', 'group').order_by(
+        '-pub_date', '-pk'
+    )[:settings.FEED_SIZE])
+    feed = FORMATS[kind](
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description,
+        feed_url=request.build_absolute_uri(),
+        language=settings.LANGUAGE_CODE,
+        entries=(_entry(request, post) for post in posts),
+        updated=posts[0].pub_date if posts else None,
+    )
+    return StreamingHttpResponse(
+        feed.stream(), content_type=feed.content_type
+    )
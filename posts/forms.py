@@ -1,13 +1,40 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
+from django.template.defaultfilters import filesizeformat
 
+from . import images
 from .models import Comment, Post
 
 
 class PostForm(ModelForm):
+    def __init__(self, *args, oversized=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        # поля с файлами, отброшенными при разборе запроса
+        self.oversized = oversized
+
     class Meta:
         model = Post
         fields = ('group', 'text', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if 'image' in self.oversized:
+            raise ValidationError(
+                'Файл больше %(limit)s',
+                code='file_too_large',
+                params={'limit': filesizeformat(settings.UPLOAD_MAX_BYTES)},
+            )
+        if not isinstance(image, UploadedFile):
+            return image
+        try:
+            return images.process(image)
+        except images.InvalidImage:
+            raise ValidationError(
+                'Не удалось прочитать картинку', code='invalid_image'
+            )
+
 
 class CommentForm(ModelForm):
     class Meta:
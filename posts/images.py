@@ -0,0 +1,124 @@
+"""Обработка загруженных картинок записей.
+
+Файлы больше UPLOAD_MAX_BYTES отбрасываются при разборе запроса
+и не попадают ни в память, ни на диск. Остальные уменьшаются
+до POST_IMAGE_MAX_SIDE по большей стороне и перекодируются в WebP
+(или прогрессивный JPEG, если Pillow собран без WebP) без метаданных.
+Перекодирование идёт в пуле из IMAGE_WORKERS процессов.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from PIL import Image, ImageOps, features
+
+# картинки с большим числом точек не распаковываются
+MAX_PIXELS = 50_000_000
+
+if features.check('webp'):
+    FORMAT, EXTENSION, OPTIONS = 'WEBP', 'webp', {'quality': 80, 'method': 4}
+else:
+    FORMAT, EXTENSION, OPTIONS = 'JPEG', 'jpg', {
+        'quality': 85, 'optimize': True, 'progressive': True,
+    }
+
+_executor = None
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Пропускает файлы больше UPLOAD_MAX_BYTES, не сохраняя их.
+
+    Имена пропущенных полей запоминаются в `request.oversized_uploads`.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_BYTES:
+            oversized = getattr(self.request, 'oversized_uploads', set())
+            oversized.add(self.field_name)
+            self.request.oversized_uploads = oversized
+            raise SkipFile
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def oversized(request):
+    return getattr(request, 'oversized_uploads', set())
+
+
+def encode(source, max_side):
+    """Уменьшает и перекодирует картинку, возвращает байты файла.
+
+    `source` - путь к файлу или его содержимое. Выполняется в процессе
+    пула, поэтому не обращается к Django.
+    """
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    try:
+        return _encode(Image.open(source), max_side)
+    except (OSError, SyntaxError, Image.DecompressionBombError) as error:
+        # файл обрезан, не картинка или слишком велик
+        raise InvalidImage(str(error))
+
+
+def _encode(image, max_side):
+    with image:
+        # размер известен из заголовка, до распаковки точек
+        if image.width * image.height > MAX_PIXELS:
+            raise InvalidImage(f'{image.width}x{image.height}')
+        image.draft('RGB', (max_side, max_side))
+        # поворот из EXIF применяется до того, как метаданные отброшены
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or (
+            image.mode == 'P' and 'transparency' in image.info
+        )
+        if FORMAT == 'JPEG' or not has_alpha:
+            image = image.convert('RGB')
+        elif image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        output = BytesIO()
+        # info и exif не передаются, метаданные в файл не попадают
+        image.save(output, FORMAT, **OPTIONS)
+    return output.getvalue()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn: процессы не наследуют потоки и соединения сервера
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            mp_context=get_context('spawn'),
+        )
+    return _executor
+
+
+def process(upload):
+    """Перекодированная копия загруженного файла для ImageField."""
+    if hasattr(upload, 'temporary_file_path'):
+        source = upload.temporary_file_path()
+    else:
+        upload.seek(0)
+        source = upload.read()
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    if settings.IMAGE_WORKERS:
+        content = _get_executor().submit(encode, source, max_side).result()
+    else:
+        content = encode(source, max_side)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(content, name=f'{name}.{EXTENSION}')
@@ -0,0 +1,87 @@
+"""Запросы к WSGI-приложению от имени посетителей для нагрузочных замеров."""
+import statistics
+import sys
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.middleware.csrf import _get_new_csrf_token
+from django.test import Client
+from django.utils.http import urlencode
+
+from yatube.wsgi import application
+
+# адрес вне INTERNAL_IPS, чтобы не включалась debug toolbar
+REMOTE_ADDR = '192.0.2.1'
+
+
+def percentile(values, percent):
+    """Значение, ниже которого лежит `percent` процентов замеров."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[
+        percent - 1
+    ]
+
+
+class Visitor:
+    """Пользователь с сессией и csrf-токеном для запросов к WSGI."""
+
+    def __init__(self, user=None):
+        self.cookies = {}
+        self.csrf_token = None
+        if user is not None:
+            client = Client()
+            client.force_login(user)
+            self.cookies[settings.SESSION_COOKIE_NAME] = client.cookies[
+                settings.SESSION_COOKIE_NAME
+            ].value
+            self.csrf_token = _get_new_csrf_token()
+            self.cookies[settings.CSRF_COOKIE_NAME] = self.csrf_token
+
+    def environ(self, method, path, data=None):
+        body = urlencode(data or {}).encode() if method == 'POST' else b''
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(data or {}) if method == 'GET' else '',
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': REMOTE_ADDR,
+            'HTTP_COOKIE': '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            ),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if self.csrf_token:
+            environ['HTTP_X_CSRFTOKEN'] = self.csrf_token
+        return environ
+
+    def request(self, method, path, data=None):
+        """Выполняет запрос, возвращает время ответа в мс и статус."""
+        status = None
+
+        def start_response(status_line, headers, exc_info=None):
+            nonlocal status
+            status = int(status_line.split()[0])
+
+        started = time.perf_counter()
+        response = application(
+            self.environ(method, path, data), start_response
+        )
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return (time.perf_counter() - started) * 1000, status
@@ -0,0 +1,291 @@
+import json
+import logging
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from posts import loadtest, seeding
+from posts.models import Group, Post, User
+
+# маршруты, которые обходит замер
+URLCONFS = ('posts.urls', 'users.urls', 'about.urls')
+
+
+def _route_names(urlconf):
+    names = set()
+    for pattern in get_resolver(urlconf).url_patterns:
+        if isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+        elif isinstance(pattern, URLResolver):
+            names |= _route_names(pattern.urlconf_name)
+    return names
+
+
+class Scenarios:
+    """Запросы к каждому маршруту по данным из базы."""
+
+    def __init__(self, seed):
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.numbers = count()
+        self.usernames = list(User.objects.values_list('username', flat=True))
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.posts = list(Post.objects.values_list('author__username', 'pk'))
+        # читатель с самой большой лентой и автор с самым большим профилем
+        self.reader = User.objects.order_by('-stats__following').first()
+        self.author = User.objects.order_by('-stats__posts').first()
+        self.own_posts = list(Post.objects.filter(
+            author=self.author
+        ).values_list('pk', flat=True))
+        self.guest = loadtest.Visitor()
+        self.reader_visitor = loadtest.Visitor(self.reader)
+        self.author_visitor = loadtest.Visitor(self.author)
+
+    def choice(self, items):
+        with self.lock:
+            return self.rnd.choice(items)
+
+    def text(self):
+        with self.lock:
+            return f'{seeding.text(self.rnd)} {next(self.numbers)}'
+
+    def feeds(self):
+        """Ленты Atom и RSS, формат ленты - уточнение к имени маршрута."""
+        return [
+            scenario
+            for kind in ('atom', 'rss')
+            for scenario in (
+                ('site_feed', 'GET',
+                 lambda kind=kind: (self.guest, f'/feed/{kind}/', None),
+                 kind),
+                ('group_feed', 'GET', lambda kind=kind: (
+                    self.guest,
+                    f'/group/{self.choice(self.slugs)}/feed/{kind}/', None
+                ), kind),
+                ('profile_feed', 'GET', lambda kind=kind: (
+                    self.guest,
+                    f'/{self.choice(self.usernames)}/feed/{kind}/', None
+                ), kind),
+            )
+        ]
+
+    def all(self):
+        """Имя маршрута, метод, функция, строящая запрос, и необязательное
+        уточнение, которое отличает сценарии одного маршрута в отчёте.
+        """
+        author = self.author.username
+        return [
+            ('index', 'GET', lambda: (self.guest, '/', None)),
+            ('index', 'GET', lambda: (self.reader_visitor, '/', None)),
+            ('follow_index', 'GET',
+             lambda: (self.reader_visitor, '/follow/', None)),
+            ('group', 'GET', lambda: (
+                self.guest, f'/group/{self.choice(self.slugs)}/', None
+            )),
+            ('trending', 'GET', lambda: (self.guest, '/trending/', None)),
+            ('group_trending', 'GET', lambda: (
+                self.guest, f'/group/{self.choice(self.slugs)}/trending/',
+                None
+            )),
+            ('new_post', 'GET',
+             lambda: (self.author_visitor, '/new/', None)),
+            ('new_post', 'POST', lambda: (
+                self.author_visitor, '/new/', {'text': self.text()}
+            )),
+            ('search', 'GET', lambda: (
+                self.guest, '/search/', {'q': self.choice(seeding.WORDS)}
+            )),
+            ('profile', 'GET', lambda: (
+                self.guest, f'/{self.choice(self.usernames)}/', None
+            )),
+            ('profile', 'GET', lambda: (
+                self.reader_visitor, f'/{self.choice(self.usernames)}/', None
+            )),
+            ('post', 'GET', lambda: (
+                self.guest, '/{}/{}/'.format(*self.choice(self.posts)), None
+            )),
+            ('post_edit', 'GET', lambda: (
+                self.author_visitor,
+                f'/{author}/{self.choice(self.own_posts)}/edit/', None
+            )),
+            ('post_edit', 'POST', lambda: (
+                self.author_visitor,
+                f'/{author}/{self.choice(self.own_posts)}/edit/',
+                {'text': self.text()},
+            )),
+            ('add_comment', 'POST', lambda: (
+                self.reader_visitor,
+                '/{}/{}/comment/'.format(*self.choice(self.posts)),
+                {'text': self.text()},
+            )),
+            ('profile_follow', 'GET', lambda: (
+                self.reader_visitor,
+                f'/{self.choice(self.usernames)}/follow/', None
+            )),
+            ('profile_unfollow', 'GET', lambda: (
+                self.reader_visitor,
+                f'/{self.choice(self.usernames)}/unfollow/', None
+            )),
+            *self.feeds(),
+            ('signup', 'GET', lambda: (self.guest, '/auth/signup/', None)),
+            ('author', 'GET', lambda: (self.guest, '/about/author/', None)),
+            ('tech', 'GET', lambda: (self.guest, '/about/tech/', None)),
+        ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает все маршруты posts, users и about через WSGI-приложение '
+        'на временной базе с синтетическими данными и выводит задержки, '
+        'пропускную способность и число запросов к базе в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Подписок на пользователя',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов к каждому маршруту',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результата в JSON')
+        parser.add_argument(
+            '--compare', metavar='BASELINE',
+            help='Сравнить с результатом прошлого запуска',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно BASELINE, доля',
+        )
+
+    def handle(self, *args, **options):
+        # ошибки попадают в отчёт, трассировки в консоли не нужны
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        dataset = {
+            name: options[name]
+            for name in ('users', 'groups', 'posts', 'comments', 'follows')
+        }
+        with seeding.temporary_database():
+            sizes = seeding.seed(**dataset, random_seed=options['seed'])
+            scenarios = Scenarios(options['seed'])
+            routes = scenarios.all()
+            missing = set().union(
+                *map(_route_names, URLCONFS)
+            ) - {name for name, *_ in routes}
+            if missing:
+                raise CommandError(
+                    f'Нет сценариев для маршрутов: {sorted(missing)}'
+                )
+            results = {}
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                for name, method, build, *variant in routes:
+                    visitor = build()[0]
+                    key = ' '.join((
+                        name, method, 'user' if visitor.cookies else 'guest',
+                        *variant,
+                    ))
+                    results[key] = self.measure(
+                        pool, build, method,
+                        options['requests'], options['warmup'],
+                    )
+        report = {
+            'commit': self.commit(),
+            'dataset': sizes,
+            'concurrency': options['concurrency'],
+            'routes': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            self.compare(options['compare'], results, options['tolerance'])
+
+    def request(self, build, method):
+        visitor, path, data = build()
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            elapsed, status = visitor.request(method, path, data)
+        return elapsed, queries, status
+
+    def measure(self, pool, build, method, requests, warmup):
+        list(pool.map(lambda _: self.request(build, method), range(warmup)))
+        started = time.perf_counter()
+        samples = list(pool.map(
+            lambda _: self.request(build, method), range(requests)
+        ))
+        wall = time.perf_counter() - started
+        timings = sorted(sample[0] for sample in samples)
+        return {
+            'requests': requests,
+            'errors': sum(1 for sample in samples if sample[2] >= 400),
+            'p50_ms': round(loadtest.percentile(timings, 50), 2),
+            'p95_ms': round(loadtest.percentile(timings, 95), 2),
+            'p99_ms': round(loadtest.percentile(timings, 99), 2),
+            'throughput_rps': round(requests / wall, 1),
+            'queries_per_request': round(
+                statistics.mean(sample[1] for sample in samples), 2
+            ),
+        }
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'),
+                capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            return None
+
+    def compare(self, path, results, tolerance):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['routes']
+        regressions = []
+        for key, result in results.items():
+            base = baseline.get(key)
+            if base is None:
+                continue
+            slower = result['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+            # число запросов не зависит от шума, растёт только от кода
+            more_queries = (
+                result['queries_per_request']
+                > base['queries_per_request'] + 0.5
+            )
+            if slower or more_queries:
+                regressions.append(
+                    f"{key}: p95 {base['p95_ms']} -> {result['p95_ms']} мс, "
+                    f"запросов {base['queries_per_request']} -> "
+                    f"{result['queries_per_request']}"
+                )
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно {}:\n{}'.format(
+                    path, '\n'.join(regressions)
+                )
+            )
+        self.stderr.write(f'Регрессий относительно {path} нет')
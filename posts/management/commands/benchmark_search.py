@@ -0,0 +1,62 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import search, seeding
+from posts.models import Post
+
+QUERIES = [
+    'город', 'поезд кофе', 'рыбалка дождь осень', 'слово40000',
+    'город слово100',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полнотекстовый поиск с поиском через icontains '
+        'на временной базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, posts, repeat, seed, **options):
+        with seeding.temporary_database():
+            seeding.seed(users=100, groups=20, posts=posts, comments=0,
+                         follows=0, random_seed=seed)
+            result = {
+                'posts': posts,
+                'fts': search.fts_enabled(),
+                'queries': [self.measure(query, repeat) for query in QUERIES],
+            }
+        self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+
+    def measure(self, query, repeat):
+        icontains = Post.objects.all()
+        for word in query.split():
+            icontains = icontains.filter(text__icontains=word)
+        return {
+            'query': query,
+            'found': search.search(query).count(),
+            'search_ms': self.timeit(
+                lambda: list(search.search(query).order_by(
+                    'search_rank', 'pk'
+                )[:10]),
+                repeat,
+            ),
+            'icontains_ms': self.timeit(
+                lambda: list(icontains.order_by('-pub_date', '-pk')[:10]),
+                repeat,
+            ),
+        }
+
+    def timeit(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(min(timings), 2)
@@ -0,0 +1,130 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from posts import loadtest, seeding
+from posts.models import Post, User
+
+# настройки SQLite в Django по умолчанию
+DEFAULTS = {'PRAGMAS': {}, 'TRANSACTION_MODE': None, 'CONN_MAX_AGE': 0}
+
+# посетители и адреса, которые процессы нагрузки получают при fork
+_state = {}
+
+
+def _loop(kind, deadline, number):
+    """Процесс-воркер: читает ленту или пишет записи и комментарии."""
+    reader, writer = _state['reader'], _state['writer']
+    samples = []
+    try:
+        while time.monotonic() < deadline:
+            if kind == 'read':
+                # страница для авторизованных не кэшируется
+                samples.append(reader.request('GET', '/'))
+                continue
+            number += 1
+            text = f'Нагрузка {os.getpid()} {number}'
+            if number % 2:
+                samples.append(
+                    writer.request('POST', '/new/', {'text': text})
+                )
+            else:
+                samples.append(writer.request(
+                    'POST', _state['comment_url'], {'text': text}
+                ))
+    finally:
+        connections.close_all()
+    return samples
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает базу из нескольких процессов, как воркеры gunicorn: '
+        'одни читают ленту, другие пишут записи и комментарии. Сравнивает '
+        'настройки SQLite по умолчанию с настройками проекта, результат '
+        'выводит в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность нагрузки для каждой конфигурации, с',
+        )
+        parser.add_argument('--posts', type=int, default=2000)
+
+    def handle(self, *args, readers, writers, duration, posts, **options):
+        # ошибки попадают в отчёт, трассировки в консоли не нужны
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        configured = {
+            key: connection.settings_dict.get(key, DEFAULTS[key])
+            for key in DEFAULTS
+        }
+        report = {}
+        for name, config in (('default', DEFAULTS), ('tuned', configured)):
+            saved = {key: connection.settings_dict.get(key) for key in config}
+            connection.settings_dict.update(config)
+            try:
+                with seeding.temporary_database():
+                    seeding.seed(users=50, posts=posts, comments=posts,
+                                 follows=10)
+                    report[name] = {
+                        'settings': config,
+                        **self.run(readers, writers, duration),
+                    }
+            finally:
+                connection.settings_dict.update(saved)
+        for kind in ('reads', 'writes'):
+            report[f'{kind}_throughput_ratio'] = round(
+                report['tuned'][kind]['throughput_rps']
+                / max(report['default'][kind]['throughput_rps'], 0.1), 2
+            )
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def run(self, readers, writers, duration):
+        global _state
+        post = Post.objects.select_related('author').first()
+        _state = {
+            'reader': loadtest.Visitor(User.objects.order_by('pk').first()),
+            'writer': loadtest.Visitor(User.objects.order_by('pk').last()),
+            'comment_url': f'/{post.author.username}/{post.pk}/comment/',
+        }
+        # дочерние процессы не должны наследовать открытые соединения
+        connections.close_all()
+        deadline = time.monotonic() + duration
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(readers + writers, context) as pool:
+            reads = [
+                pool.submit(_loop, 'read', deadline, number)
+                for number in range(readers)
+            ]
+            writes = [
+                pool.submit(_loop, 'write', deadline, number)
+                for number in range(writers)
+            ]
+            reads = [s for future in reads for s in future.result()]
+            writes = [s for future in writes for s in future.result()]
+        return {
+            'reads': self.summary(reads, duration),
+            'writes': self.summary(writes, duration),
+        }
+
+    def summary(self, samples, duration):
+        timings = sorted(elapsed for elapsed, _ in samples)
+        if not timings:
+            return {'requests': 0}
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, status in samples if status >= 400),
+            'throughput_rps': round(len(samples) / duration, 1),
+            'p50_ms': round(loadtest.percentile(timings, 50), 2),
+            'p95_ms': round(loadtest.percentile(timings, 95), 2),
+            'p99_ms': round(loadtest.percentile(timings, 99), 2),
+        }
@@ -0,0 +1,70 @@
+import json
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from posts import loadtest
+
+# Accept-Encoding браузеров разного возраста
+ENCODINGS = {
+    'identity': '',
+    'gzip': 'gzip, deflate',
+    'br': 'gzip, deflate, br',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает байты статики, которые скачивает посетитель при первом '
+        'открытии страницы, без сжатия и со сжатыми копиями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+
+    def handle(self, *args, path, **options):
+        client = Client(REMOTE_ADDR=loadtest.REMOTE_ADDR)
+        page = client.get(path)
+        if page.status_code != 200:
+            raise CommandError(f'{path}: ответ {page.status_code}')
+        assets = []
+        totals = dict.fromkeys(ENCODINGS, 0)
+        for name in self.static_names(page.content.decode()):
+            if not staticfiles_storage.is_hashed(name):
+                name = staticfiles_storage.stored_name(name)
+            url = settings.STATIC_URL + name
+            asset = {'name': name, 'url': url}
+            for encoding, header in ENCODINGS.items():
+                response = client.get(url, HTTP_ACCEPT_ENCODING=header)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{url}: ответ {response.status_code}, '
+                        'запустите collectstatic'
+                    )
+                size = len(b''.join(response.streaming_content))
+                asset[encoding] = size
+                totals[encoding] += size
+            asset['cache_control'] = response.get('Cache-Control', '')
+            assets.append(asset)
+        result = {
+            'path': path,
+            'assets': assets,
+            'total': totals,
+            'saved': {
+                encoding: totals['identity'] - size
+                for encoding, size in totals.items()
+                if encoding != 'identity'
+            },
+        }
+        self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+
+    def static_names(self, html):
+        pattern = re.escape(settings.STATIC_URL) + r'([^"\'?#\s]+)'
+        names = []
+        for name in re.findall(pattern, html):
+            if name not in names:
+                names.append(name)
+        return names
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, записи, комментарии и подписки '
+        'в формате JSON Lines'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки, по умолчанию - стандартный вывод',
+        )
+        parser.add_argument(
+            '--models', nargs='+', choices=transfer.MODELS,
+            default=transfer.MODELS,
+            help='Выгружаемые модели',
+        )
+
+    def handle(self, *args, path, models, **options):
+        # порядок моделей важен: загрузка идёт в том же порядке
+        models = [name for name in transfer.MODELS if name in models]
+        if path == '-':
+            total = transfer.export(sys.stdout, models)
+        else:
+            with open(path, 'w', encoding='utf-8') as stream:
+                total = transfer.export(stream, models)
+        self.stderr.write(f'Выгружено строк: {total}')
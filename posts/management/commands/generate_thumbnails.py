@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _generate(pk, force):
+    try:
+        thumbnails.generate(pk, force)
+    except Exception as error:
+        return pk, error
+    return pk, None
+
+
+def _init_worker():
+    # при запуске через spawn процесс начинает с чистого интерпретатора
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии картинок записей в нескольких процессах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов, 0 - создавать в текущем процессе',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать уже существующие копии',
+        )
+
+    def handle(self, *args, workers, force, **options):
+        pks = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('pk', flat=True)
+        if workers:
+            pks = list(pks)
+            # дочерние процессы не должны наследовать открытые соединения
+            connections.close_all()
+            pool = ProcessPoolExecutor(workers, initializer=_init_worker)
+            with pool:
+                total, failed = self.report(
+                    pool.map(_generate, pks, repeat(force), chunksize=16)
+                )
+        else:
+            total, failed = self.report(
+                _generate(pk, force) for pk in pks.iterator()
+            )
+        self.stdout.write(
+            f'Обработано картинок: {total}, с ошибками: {failed}'
+        )
+
+    def report(self, results):
+        total = failed = 0
+        for pk, error in results:
+            total += 1
+            if error is not None:
+                failed += 1
+                self.stderr.write(f'Запись {pk}: {error}')
+        return total, failed
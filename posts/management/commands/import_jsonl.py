@@ -0,0 +1,50 @@
+import os
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные, выгруженные командой export_jsonl. '
+        'Номер последней сохранённой строки пишется в файл <path>.checkpoint, '
+        'с --resume загрузка продолжается с него. Строки читаются '
+        'пачками, но для пересчёта подсказок в конце загрузки весь граф '
+        'подписок держится в памяти'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSON Lines')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку',
+        )
+
+    def handle(self, *args, path, batch_size, resume, **options):
+        checkpoint = f'{path}.checkpoint'
+        start = 0
+        if resume and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                start = int(file.read() or 0)
+            self.stdout.write(f'Продолжаем со строки {start + 1}')
+
+        def save_checkpoint(number):
+            with open(f'{checkpoint}.tmp', 'w') as file:
+                file.write(str(number))
+            os.replace(f'{checkpoint}.tmp', checkpoint)
+
+        try:
+            with open(path, encoding='utf-8') as stream:
+                total = transfer.load(
+                    stream, batch_size, start, on_batch=save_checkpoint
+                )
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Загрузка прервана: {error!r}')
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        # страницы и счётчики в кэше построены по старым данным
+        cache.clear()
+        self.stdout.write(f'Загружено записей: {total}')
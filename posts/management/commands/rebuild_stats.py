@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats, timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики пользователей в UserStats'
+
+    def handle(self, *args, **options):
+        updated = stats.rebuild()
+        timeline.mark_popular()
+        self.stdout.write(f'Пересчитано пользователей: {updated}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает подсказки «на кого подписаться» по всему графу'
+
+    def handle(self, *args, **options):
+        created = suggestions.rebuild()
+        self.stdout.write(f'Сохранено подсказок: {created}')
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.28 on 2026-10-18 10:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('posts', 'UserStats')
+    counters = {
+        'followers': (apps.get_model('posts', 'Follow'), 'author'),
+        'following': (apps.get_model('posts', 'Follow'), 'user'),
+        'posts': (apps.get_model('posts', 'Post'), 'author'),
+        'comments': (apps.get_model('posts', 'Comment'), 'author'),
+    }
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in User.objects.values_list(
+            'pk', flat=True
+        )),
+        batch_size=500,
+    )
+    updates = {}
+    for name, (model, field) in counters.items():
+        rows = model.objects.filter(
+            **{field: OuterRef('user')}
+        ).order_by().values(field).annotate(total=Count('pk')).values('total')
+        updates[name] = Coalesce(Subquery(rows), 0)
+    UserStats.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0019_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+            ],
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 2.2.28 on 2026-10-18 10:54
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+import posts.models
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def fts_sql(apps):
+    post = apps.get_model('posts', 'Post')._meta.db_table
+    group = apps.get_model('posts', 'Group')._meta.db_table
+    user = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))._meta.db_table
+    author = (
+        f"(SELECT username || ' ' || first_name || ' ' || last_name "
+        f"FROM {user} WHERE id = new.author_id)"
+    )
+    group_title = (
+        f"COALESCE((SELECT title FROM {group} WHERE id = new.group_id), '')"
+    )
+    return [
+        "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+        "text, group_title, author_name, "
+        "tokenize = 'unicode61 remove_diacritics 2')",
+        # совпадение в тексте весит больше, чем в названии группы и авторе
+        "INSERT INTO posts_post_fts(posts_post_fts, rank) "
+        "VALUES ('rank', 'bm25(1.0, 0.5, 0.5)')",
+        f"CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON {post} BEGIN "
+        f"INSERT INTO posts_post_fts(rowid, text, group_title, author_name) "
+        f"VALUES (new.id, new.text, {group_title}, {author}); END",
+        f"CREATE TRIGGER posts_post_fts_update "
+        f"AFTER UPDATE OF text, group_id, author_id ON {post} BEGIN "
+        f"UPDATE posts_post_fts SET text = new.text, "
+        f"group_title = {group_title}, author_name = {author} "
+        f"WHERE rowid = new.id; END",
+        f"CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON {post} BEGIN "
+        f"DELETE FROM posts_post_fts WHERE rowid = old.id; END",
+        f"CREATE TRIGGER posts_group_fts_update "
+        f"AFTER UPDATE OF title ON {group} BEGIN "
+        f"UPDATE posts_post_fts SET group_title = new.title WHERE rowid IN "
+        f"(SELECT id FROM {post} WHERE group_id = new.id); END",
+        f"CREATE TRIGGER posts_author_fts_update "
+        f"AFTER UPDATE OF username, first_name, last_name ON {user} BEGIN "
+        f"UPDATE posts_post_fts SET author_name = "
+        f"new.username || ' ' || new.first_name || ' ' || new.last_name "
+        f"WHERE rowid IN (SELECT id FROM {post} WHERE author_id = new.id); "
+        f"END",
+        f"INSERT INTO posts_post_fts(rowid, text, group_title, author_name) "
+        f"SELECT p.id, p.text, COALESCE(g.title, ''), "
+        f"u.username || ' ' || u.first_name || ' ' || u.last_name "
+        f"FROM {post} p JOIN {user} u ON u.id = p.author_id "
+        f"LEFT JOIN {group} g ON g.id = p.group_id",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    if has_fts5(schema_editor.connection):
+        for sql in fts_sql(apps):
+            schema_editor.execute(sql)
+        return
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for post in Post.objects.select_related('author', 'group').iterator():
+        document = ' '.join((
+            post.text,
+            post.author.username,
+            post.author.first_name,
+            post.author.last_name,
+            post.group.title if post.group else '',
+        ))
+        terms = Counter(
+            token[:64] for token in re.findall(r'\w+', document.lower())
+        )
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post_id=post.pk, weight=weight)
+            for term, weight in terms.items()
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if has_fts5(schema_editor.connection):
+        # триггеры на таблицах записей, групп и пользователей
+        # не удаляются вместе с виртуальной таблицей
+        for trigger in ('post_fts_insert', 'post_fts_update',
+                        'post_fts_delete', 'group_fts_update',
+                        'author_fts_update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS posts_{trigger}')
+        schema_editor.execute('DROP TABLE IF EXISTS posts_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_userstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchIndex',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='posts.Post')),
+                ('document', posts.models.SearchDocumentField(db_column='posts_post_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'posts_post_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
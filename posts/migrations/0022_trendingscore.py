@@ -0,0 +1,66 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:42
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_scores(apps, schema_editor):
+    # те же формулы, что и в posts.trending, на момент миграции
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    TrendingScore = apps.get_model('posts', 'TrendingScore')
+    epoch = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    tau = settings.TRENDING_HALF_LIFE / math.log(2)
+
+    def points(when):
+        return (when - epoch).total_seconds() / tau
+
+    scores, groups = {}, {}
+    for pk, group_id, pub_date in Post.objects.values_list(
+        'pk', 'group_id', 'pub_date'
+    ).iterator():
+        scores[pk], groups[pk] = points(pub_date), group_id
+    # комментарии без записи в рейтинг не входят
+    for post_id, created in Comment.objects.filter(
+        post__isnull=False
+    ).values_list('post_id', 'created').iterator():
+        a, b = scores[post_id], points(created)
+        scores[post_id] = max(a, b) + math.log1p(math.exp(-abs(a - b)))
+    TrendingScore.objects.bulk_create(
+        (
+            TrendingScore(post_id=pk, group_id=groups[pk], score=score)
+            for pk, score in scores.items()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['-score'], name='trending_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['group', '-score'], name='trending_group_score_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:50
+
+from django.db import migrations
+import posts.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=posts.models.ImageVariantsField(editable=False, null=True),
+        ),
+    ]
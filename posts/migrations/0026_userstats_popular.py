@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_popular(apps, schema_editor):
+    # до флага популярность определялась числом подписчиков
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers__gte=settings.TIMELINE_FANOUT_LIMIT
+    ).update(popular=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='popular',
+            field=models.BooleanField(default=False, verbose_name='Популярный'),
+        ),
+        migrations.RunPython(mark_popular, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
+import json
 from textwrap import shorten
 
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 User = get_user_model()
 
@@ -15,6 +19,38 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Записи со всем, что нужно карточке, за один запрос."""
+        comments = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(total=Count('pk')).values('total')
+        return self.select_related('author', 'group').annotate(
+            comments_count=Coalesce(
+                Subquery(comments, output_field=IntegerField()), 0
+            )
+        )
+
+
+class ImageVariantsField(models.TextField):
+    """Словарь, хранящийся в базе строкой JSON."""
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                # копии можно создать заново, испорченное описание забываем
+                return {}
+        return value if isinstance(value, dict) else {}
+
+    def get_prep_value(self, value):
+        return json.dumps(value) if value else None
+
+
 class Post(models.Model):
     text = models.TextField('Текст', help_text='Введите Ваш текст')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
@@ -35,13 +71,51 @@ class Post(models.Model):
         help_text='Выберите группу',
     )
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # уменьшенные копии картинки, см. posts.thumbnails
+    image_variants = ImageVariantsField(null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        # ленты сортируются по (-pub_date, -id), индексы читаются
+        # в обратном порядке без сортировки
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'),
+                name='post_pub_date_idx'),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pub_date_idx'),
+            models.Index(
+                fields=('group', 'pub_date', 'id'),
+                name='post_group_pub_date_idx'),
+        )
 
     def __str__(self):
         return shorten(self.text, 15, placeholder='...')
 
+    def image_sources(self):
+        """srcset и размеры копий картинки по форматам.
+
+        Пока копии текущей картинки не созданы, возвращает пустой словарь.
+        """
+        variants = self.image_variants or {}
+        if not self.image or variants.get('image') != self.image.name:
+            return {}
+        sources = {}
+        for variant in variants['variants']:
+            source = sources.setdefault(variant['format'], {'srcset': []})
+            url = default_storage.url(variant['name'])
+            source['srcset'].append(f"{url} {variant['width']}w")
+            # src, width и height - по самой большой копии
+            source.update(
+                src=url, width=variant['width'], height=variant['height']
+            )
+        for source in sources.values():
+            source['srcset'] = ', '.join(source['srcset'])
+        return sources
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -63,6 +137,11 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created', 'id'),
+                name='comment_post_created_idx'),
+        )
 
 
 class Follow(models.Model):
@@ -83,6 +162,174 @@ class Follow(models.Model):
                 fields=('user', 'author'),
                 name='unique_follow'),
         )
+        indexes = (
+            # подписчики автора читаются без обращения к таблице
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.user} - {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    # копия Post.pub_date, чтобы лента читалась одним проходом по индексу
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', 'pub_date', 'post'),
+                name='timeline_user_feed_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.user} - {self.post}'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые показываются в карточке автора."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    followers = models.PositiveIntegerField('Подписчиков', default=0)
+    following = models.PositiveIntegerField('Подписок', default=0)
+    posts = models.PositiveIntegerField('Записей', default=0)
+    comments = models.PositiveIntegerField('Комментариев', default=0)
+    # записи автора не раскладываются по лентам, см. posts.timeline
+    popular = models.BooleanField('Популярный', default=False)
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TrendingScore(models.Model):
+    """Рейтинг записи для страниц популярного, см. posts.trending."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    # копия Post.group, чтобы рейтинг группы читался по одному индексу
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+    )
+    score = models.FloatField('Рейтинг')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('-score',), name='trending_score_idx'),
+            models.Index(
+                fields=('group', '-score'),
+                name='trending_group_score_idx'),
+        )
+
+    def __str__(self):
+        return str(self.post)
+
+
+class FollowSuggestion(models.Model):
+    """Автор, на которого стоит подписаться, см. posts.suggestions."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField('Рейтинг')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow_suggestion'),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-score', 'author'),
+                name='suggestion_user_score_idx'),
+        )
 
     def __str__(self):
         return f'{self.user} - {self.author}'
+
+
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы, по нему ищут MATCH."""
+
+
+SearchDocumentField.register_lookup(Match)
+
+
+class PostSearchIndex(models.Model):
+    """Виртуальная таблица FTS5, которую ведут триггеры базы (SQLite)."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    document = SearchDocumentField(db_column='posts_post_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
+
+
+class SearchTerm(models.Model):
+    """Обратный индекс для поиска на базах без FTS5."""
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+    )
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'),
+                name='unique_search_term'),
+        )
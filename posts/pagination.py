@@ -0,0 +1,149 @@
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        paginator.link(self)
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу сортировки вместо OFFSET.
+
+    Курсор - непрозрачный токен со значениями полей `ordering` у крайней
+    записи страницы и направлением перехода. Поля сортировки должны
+    однозначно упорядочивать записи, поэтому последним идёт `pk`.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk')):
+        self.object_list = object_list.order_by(*ordering)
+        self.per_page = int(per_page)
+        self.ordering = ordering
+
+    def cursor(self, obj, direction):
+        values = [getattr(obj, field.lstrip('-')) for field in self.ordering]
+        token = json.dumps([direction, values], default=str)
+        return urlsafe_base64_encode(force_bytes(token))
+
+    def link(self, page):
+        """Проставляет странице курсоры соседних страниц."""
+        page.next_cursor = page.previous_cursor = None
+        if not page.object_list:
+            return
+        if page.has_next():
+            page.next_cursor = self.cursor(page.object_list[-1], NEXT)
+        if page.has_previous():
+            page.previous_cursor = self.cursor(page.object_list[0], PREVIOUS)
+
+    def decode(self, cursor):
+        try:
+            direction, values = json.loads(urlsafe_base64_decode(cursor))
+        except (ValueError, TypeError, binascii.Error):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS) or (
+            not isinstance(values, list) or len(values) != len(self.ordering)
+        ):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _seek(self, values, forward):
+        """Условие «запись лежит за ключом `values`» в порядке сортировки."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def page(self, cursor=None):
+        if not cursor:
+            object_list = list(self.object_list[:self.per_page + 1])
+            has_next = len(object_list) > self.per_page
+            return CursorPage(object_list[:self.per_page], self, has_next,
+                              False)
+        direction, values = self.decode(cursor)
+        forward = direction == NEXT
+        try:
+            queryset = self.object_list.filter(self._seek(values, forward))
+        except (ValidationError, ValueError, TypeError):
+            # значения из токена не приводятся к типам полей
+            raise InvalidCursor(cursor)
+        if not forward:
+            queryset = queryset.reverse()
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if forward:
+            return CursorPage(object_list, self, has_more, True)
+        return CursorPage(object_list[::-1], self, True, has_more)
+
+
+class CursorPaginationMixin:
+    """Пагинация списка по курсору `?cursor=` для ListView.
+
+    Без курсора работает обычная постраничная пагинация `?page=N`,
+    а ссылки «вперёд» и «назад» на её страницах ведут на курсоры.
+    """
+    cursor_kwarg = 'cursor'
+    cursor_ordering = ('-pub_date', '-pk')
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor_paginator = CursorPaginator(
+            queryset, page_size, self.cursor_ordering
+        )
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if cursor is None:
+            paginator, page, _, is_paginated = super().paginate_queryset(
+                cursor_paginator.object_list, page_size
+            )
+            page.object_list = list(page.object_list)
+            cursor_paginator.link(page)
+            return paginator, page, page.object_list, is_paginated
+        try:
+            page = cursor_paginator.page(cursor)
+        except InvalidCursor:
+            raise Http404('Неверный курсор')
+        return cursor_paginator, page, page.object_list, (
+            page.has_other_pages()
+        )
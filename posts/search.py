@@ -0,0 +1,87 @@
+"""Полнотекстовый поиск по записям.
+
+На SQLite с FTS5 записи индексирует виртуальная таблица `posts_post_fts`:
+её заполняют триггеры базы при изменении записей, групп и пользователей.
+На остальных базах поиск идёт по обратному индексу `SearchTerm`, который
+ведут сигналы. Оба варианта дают запросу аннотацию `search_rank`:
+чем она меньше, тем выше запись в выдаче.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import (
+    Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value,
+)
+
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'posts_post_fts'
+TERM_LENGTH = SearchTerm._meta.get_field('term').max_length
+
+
+@lru_cache(maxsize=None)
+def _sqlite_has_fts5():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite' and _sqlite_has_fts5()
+
+
+def tokenize(text):
+    return [token[:TERM_LENGTH] for token in re.findall(r'\w+', text.lower())]
+
+
+def _fts_query(tokens):
+    # каждое слово в кавычках, чтобы ввод не разбирался как синтаксис FTS5
+    return ' '.join('"{}"'.format(token.replace('"', '""'))
+                    for token in tokens)
+
+
+def search(query):
+    """Записи, содержащие все слова запроса."""
+    tokens = tokenize(query)
+    if not tokens:
+        return Post.objects.annotate(
+            search_rank=Value(0, output_field=FloatField())
+        ).none()
+    if fts_enabled():
+        return Post.objects.filter(
+            search_index__document__match=_fts_query(tokens)
+        ).annotate(search_rank=F('search_index__rank'))
+    tokens = set(tokens)
+    matching = SearchTerm.objects.filter(term__in=tokens).values(
+        'post'
+    ).annotate(matches=Count('pk')).filter(matches=len(tokens))
+    weight = SearchTerm.objects.filter(
+        post=OuterRef('pk'), term__in=tokens
+    ).order_by().values('post').annotate(total=Sum('weight')).values('total')
+    return Post.objects.filter(pk__in=matching.values('post')).annotate(
+        search_rank=-Subquery(weight, output_field=IntegerField())
+    )
+
+
+def _document(post):
+    parts = [post.text, post.author.username, post.author.get_full_name()]
+    if post.group_id:
+        parts.append(post.group.title)
+    return ' '.join(parts)
+
+
+def index_post(post):
+    """Переиндексирует запись в обратном индексе."""
+    terms = Counter(tokenize(_document(post)))
+    SearchTerm.objects.filter(post=post).delete()
+    SearchTerm.objects.bulk_create(
+        SearchTerm(term=term, post=post, weight=weight)
+        for term, weight in terms.items()
+    )
+
+
+def index_posts(posts):
+    for post in posts.select_related('author', 'group').iterator():
+        index_post(post)
@@ -0,0 +1,131 @@
+"""Синтетические данные для замеров производительности."""
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+
+from . import search, stats, suggestions, timeline, trending
+from .models import Comment, Follow, Group, Post, User
+
+WORDS = [
+    'город', 'река', 'лес', 'поезд', 'музыка', 'книга', 'кофе', 'море',
+    'горы', 'рыбалка', 'футбол', 'погода', 'работа', 'отпуск', 'кино',
+    'дождь', 'снег', 'весна', 'осень', 'собака', 'кошка', 'сад', 'дача',
+    'концерт', 'выставка', 'велосипед', 'поход', 'ужин', 'праздник', 'код',
+]
+# редкие слова словаря, частоты убывают по закону Ципфа
+VOCABULARY = WORDS + [f'слово{i}' for i in range(50_000)]
+CUM_WEIGHTS = list(accumulate(
+    1 / rank for rank in range(1, len(VOCABULARY) + 1)
+))
+BATCH_SIZE = 5000
+
+
+def text(rnd, low=5, high=40):
+    return ' '.join(rnd.choices(
+        VOCABULARY, cum_weights=CUM_WEIGHTS, k=rnd.randint(low, high)
+    ))
+
+
+def _bulk_create(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = [obj for _, obj in zip(range(BATCH_SIZE), objects)]
+        if not batch:
+            return
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def seed(users=200, groups=10, posts=5000, comments=20000, follows=20,
+         random_seed=0):
+    """Заполняет базу пользователями, группами, записями, комментариями
+    и подписками, возвращает размеры набора данных.
+
+    Авторы записей распределены неравномерно: у немногих пользователей
+    большая часть записей и подписчиков, как в живой соцсети.
+    """
+    rnd = random.Random(random_seed)
+    password = make_password(None)
+    _bulk_create(User, (
+        User(username=f'user{i}', first_name=f'Имя{i}', password=password)
+        for i in range(users)
+    ))
+    _bulk_create(Group, (
+        Group(title=f'Группа {i}', slug=f'group-{i}', description=text(rnd))
+        for i in range(groups)
+    ))
+    # на SQLite bulk_create не проставляет объектам pk
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    popularity = list(accumulate(1 / rank for rank in
+                                 range(1, len(user_ids) + 1)))
+    _bulk_create(Post, (
+        Post(
+            text=text(rnd),
+            author_id=rnd.choices(user_ids, cum_weights=popularity)[0],
+            group_id=rnd.choice(group_ids),
+        )
+        for _ in range(posts)
+    ))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    _bulk_create(Comment, (
+        Comment(
+            post_id=rnd.choice(post_ids),
+            author_id=rnd.choice(user_ids),
+            text=text(rnd, 1, 15),
+        )
+        for _ in range(comments if post_ids else 0)
+    ))
+    _bulk_create(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in set(rnd.choices(
+            user_ids, cum_weights=popularity, k=follows
+        )) - {user_id}
+    ))
+    # bulk_create не шлёт сигналов, производные данные строятся здесь
+    stats.rebuild()
+    timeline.mark_popular()
+    trending.rebuild()
+    suggestions.rebuild()
+    for user_id, author_id in Follow.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        timeline.backfill(user_id, author_id)
+    if not search.fts_enabled():
+        search.index_posts(Post.objects.all())
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+@contextmanager
+def temporary_database():
+    """Временная база с применёнными миграциями вместо рабочей.
+
+    Для SQLite база создаётся в файле, а не в памяти: так её видят
+    все потоки, как и рабочую.
+    """
+    creation = connection.creation
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    directory = None
+    if connection.vendor == 'sqlite' and not old_test_name:
+        directory = tempfile.TemporaryDirectory()
+        test_settings['NAME'] = os.path.join(directory.name, 'bench.sqlite3')
+    old_name = creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+        if directory is not None:
+            directory.cleanup()
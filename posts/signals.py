@@ -0,0 +1,254 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import caching, search, stats, suggestions, timeline, trending
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.change(instance.author_id, posts=1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    stats.change(instance.author_id, posts=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.change(instance.author_id, comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    stats.change(instance.author_id, comments=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.follow(instance.user_id, instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    stats.follow(instance.user_id, instance.author_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def check_popularity(sender, instance, created=False, raw=False, **kwargs):
+    # после счётчиков и до раскладки ленты подписчика
+    if not raw:
+        timeline.followers_changed(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+def _post_tags(post):
+    tags = [
+        *caching.feed_tags(),
+        *caching.post_tags(post.author.username, post.pk),
+    ]
+    if post.group_id:
+        tags += caching.group_tags(post.group.slug)
+    return tags
+
+
+def _is_login(update_fields):
+    # вход пользователя сохраняет только last_login
+    return bool(update_fields) and set(update_fields) <= {'last_login'}
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_group_slug = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group__slug', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    tags = _post_tags(instance)
+    previous_slug = getattr(instance, '_previous_group_slug', None)
+    if previous_slug:
+        tags += caching.group_tags(previous_slug)
+    caching.invalidate(*tags)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=instance.post_id
+    ).first()
+    if post is None:
+        # запись удаляется вместе с комментариями
+        caching.invalidate(f'post:{instance.post_id}')
+        return
+    caching.invalidate(*_post_tags(post))
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, raw=False,
+                      **kwargs):
+    if instance.pk and not raw and not _is_login(update_fields):
+        instance._previous_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, update_fields=None,
+                    **kwargs):
+    if created or _is_login(update_fields):
+        return
+    tags = [
+        f'user:{instance.pk}',
+        *caching.feed_tags(),
+        *caching.profile_tags(instance.username),
+    ]
+    previous_username = getattr(instance, '_previous_username', None)
+    if previous_username:
+        tags += caching.profile_tags(previous_username)
+    # имя показывается в карточках записей и в комментариях
+    for slug in Group.objects.filter(
+        posts__author=instance
+    ).values_list('slug', flat=True).distinct():
+        tags += caching.group_tags(slug)
+    for pk in Comment.objects.filter(
+        author=instance
+    ).values_list('post_id', flat=True).distinct():
+        tags.append(f'post:{pk}')
+    caching.invalidate(*tags)
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group(sender, instance, created=False, **kwargs):
+    tags = caching.group_tags(instance.slug)
+    if created:
+        # новая группа ещё не показывается ни на одной странице
+        caching.invalidate(*tags)
+        return
+    tags += [f'group:{instance.pk}', *caching.feed_tags()]
+    previous_slug = getattr(instance, '_previous_slug', None)
+    if previous_slug:
+        tags += caching.group_tags(previous_slug)
+    for username in User.objects.filter(
+        posts__group=instance
+    ).values_list('username', flat=True).distinct():
+        tags += caching.profile_tags(username)
+    caching.invalidate(*tags)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    # счётчики подписок в карточках обоих пользователей
+    usernames = User.objects.filter(
+        pk__in=(instance.user_id, instance.author_id)
+    ).values_list('username', flat=True)
+    caching.invalidate(
+        *(
+            tag for username in usernames
+            for tag in caching.profile_tags(username)
+        ),
+        # лента подписок читателя
+        f'follows:{instance.user_id}',
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw and not search.fts_enabled():
+        search.index_post(instance)
+
+
+@receiver(post_save, sender=Group)
+def index_group_posts(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw and not search.fts_enabled():
+        search.index_posts(instance.posts.all())
+
+
+@receiver(post_save, sender=User)
+def index_author_posts(sender, instance, created, update_fields=None,
+                       raw=False, **kwargs):
+    if (created or raw or _is_login(update_fields)
+            or search.fts_enabled()):
+        return
+    search.index_posts(instance.posts.all())
+
+
+@receiver(post_save, sender=Post)
+def score_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        trending.track(instance)
+    else:
+        trending.move(instance)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.add_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def score_follow(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    slugs = trending.add_follow(instance.author_id, timezone.now())
+    if slugs:
+        # порядок на страницах популярного сайта и групп
+        caching.invalidate(*caching.feed_tags(), *(
+            tag for slug in slugs - {None}
+            for tag in caching.group_tags(slug)
+        ))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def refresh_suggestions(sender, instance, created=False, raw=False,
+                        **kwargs):
+    if not raw:
+        suggestions.refresh(instance.user_id)
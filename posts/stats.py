@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+COUNTERS = {
+    'followers': (Follow, 'author'),
+    'following': (Follow, 'user'),
+    'posts': (Post, 'author'),
+    'comments': (Comment, 'author'),
+}
+
+
+def _count(model, field):
+    rows = model.objects.filter(
+        **{field: OuterRef('user')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows), 0)
+
+
+def rebuild(users=None):
+    """Пересчитывает счётчики пользователей по исходным таблицам."""
+    if users is None:
+        users = User.objects.all()
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=pk)
+            for pk in users.filter(stats__isnull=True).values_list(
+                'pk', flat=True
+            )
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    return UserStats.objects.filter(user__in=users).update(**{
+        name: _count(model, field)
+        for name, (model, field) in COUNTERS.items()
+    })
+
+
+def change(user_id, **deltas):
+    """Сдвигает счётчики пользователя на указанные величины."""
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        name: Greatest(F(name) + delta, 0)
+        for name, delta in deltas.items()
+    })
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        # строки ещё нет, например у пользователей из bulk_create;
+        # при уменьшении её нет и у удаляемого пользователя, и создавать
+        # её нельзя: удаление упадёт на внешнем ключе
+        rebuild(User.objects.filter(pk=user_id))
+
+
+def follow(user_id, author_id, delta):
+    with transaction.atomic():
+        change(author_id, followers=delta)
+        change(user_id, following=delta)
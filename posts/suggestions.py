@@ -0,0 +1,195 @@
+"""Подсказки «на кого подписаться».
+
+Подписки хранятся разреженной матрицей смежности A в формате CSR:
+подписки пользователя с номером i - `indices[indptr[i]:indptr[i + 1]]`.
+Рейтинг кандидата w для пользователя u складывается из двух частей:
+
+* друзья друзей, строка u матрицы A·A: сколько авторов из подписок u
+  подписаны на w;
+* похожие читатели, строка u матрицы A·D⁻¹·Aᵀ·A: на кого ещё подписаны
+  читатели тех же авторов. Общий автор с D подписчиками даёт вклад 1/D:
+  общий малоизвестный автор говорит о сходстве больше, чем популярный.
+  Авторы больше чем с SUGGESTIONS_MAX_FOLLOWERS подписчиками в этой
+  части не учитываются.
+
+`rebuild` считает подсказки для всех пользователей по всему графу,
+`refresh` пересчитывает строку одного пользователя, когда меняются
+его подписки, по подграфу вокруг него. Страницы только читают
+сохранённые FollowSuggestion.
+"""
+import heapq
+from array import array
+from collections import defaultdict
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.db import transaction
+
+from . import caching
+from .models import Follow, FollowSuggestion
+
+FRIEND_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 1.0
+BATCH_SIZE = 500
+
+
+def _csr(rows, columns, size):
+    """Матрица смежности в формате CSR из пар (строка, столбец)."""
+    counts = array('q', [0]) * (size + 1)
+    for row in rows:
+        counts[row + 1] += 1
+    indptr = array('q', accumulate(counts))
+    indices = array('q', [0]) * len(rows)
+    free = indptr[:-1]
+    for row, column in zip(rows, columns):
+        indices[free[row]] = column
+        free[row] += 1
+    return indptr, indices
+
+
+class FollowGraph:
+    """Граф подписок: матрица A и транспонированная Aᵀ в формате CSR."""
+
+    def __init__(self, pairs):
+        users = array('q')
+        authors = array('q')
+        for user_id, author_id in pairs:
+            users.append(user_id)
+            authors.append(author_id)
+        self.ids = array('q', sorted(set(users) | set(authors)))
+        self.numbers = {pk: number for number, pk in enumerate(self.ids)}
+        rows = array('q', (self.numbers[pk] for pk in users))
+        columns = array('q', (self.numbers[pk] for pk in authors))
+        self.follows = _csr(rows, columns, len(self.ids))
+        self.followers = _csr(columns, rows, len(self.ids))
+
+    @staticmethod
+    def _row(matrix, number):
+        indptr, indices = matrix
+        return indices[indptr[number]:indptr[number + 1]]
+
+    def suggest(self, user_id, popular=(), size=None):
+        """Лучшие кандидаты для пользователя: пары (id автора, рейтинг).
+
+        `popular` - номера авторов, через которых похожие читатели
+        не ищутся.
+        """
+        size = size or settings.SUGGESTIONS_SIZE
+        user = self.numbers.get(user_id)
+        if user is None:
+            return []
+        followed = self._row(self.follows, user)
+        scores = defaultdict(float)
+        for author in followed:
+            for candidate in self._row(self.follows, author):
+                scores[candidate] += FRIEND_WEIGHT
+            if author in popular:
+                continue
+            readers = self._row(self.followers, author)
+            weight = CO_FOLLOW_WEIGHT / len(readers)
+            for reader in readers:
+                if reader == user:
+                    continue
+                for candidate in self._row(self.follows, reader):
+                    scores[candidate] += weight
+        excluded = set(followed)
+        excluded.add(user)
+        best = heapq.nsmallest(size, (
+            (-score, self.ids[number])
+            for number, score in scores.items()
+            if number not in excluded
+        ))
+        return [(author_id, -score) for score, author_id in best]
+
+    def popular(self):
+        """Номера авторов больше чем с SUGGESTIONS_MAX_FOLLOWERS
+        подписчиками."""
+        indptr, _ = self.followers
+        limit = settings.SUGGESTIONS_MAX_FOLLOWERS
+        return {
+            number for number in range(len(self.ids))
+            if indptr[number + 1] - indptr[number] > limit
+        }
+
+
+def _suggestions(user_id, suggested):
+    return (
+        FollowSuggestion(user_id=user_id, author_id=author_id, score=score)
+        for author_id, score in suggested
+    )
+
+
+def rebuild():
+    """Пересчитывает подсказки всех пользователей по всему графу."""
+    graph = FollowGraph(
+        Follow.objects.values_list('user_id', 'author_id').iterator()
+    )
+    popular = graph.popular()
+    rows = (
+        suggestion
+        for user_id in graph.ids
+        for suggestion in _suggestions(
+            user_id, graph.suggest(user_id, popular)
+        )
+    )
+    total = 0
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        batch = list(islice(rows, BATCH_SIZE))
+        while batch:
+            FollowSuggestion.objects.bulk_create(batch)
+            total += len(batch)
+            batch = list(islice(rows, BATCH_SIZE))
+    caching.invalidate(caching.SUGGESTIONS_TAG)
+    return total
+
+
+def _neighbourhood(user_id):
+    """Подписки, от которых зависит строка пользователя, и id популярных
+    авторов среди его подписок."""
+    limit = settings.SUGGESTIONS_MAX_FOLLOWERS
+    followed = Follow.objects.filter(user_id=user_id)
+    authors = followed.values('author_id')
+    # все читатели авторов, через которых ищутся похожие читатели
+    readers = Follow.objects.filter(
+        author__in=authors, author__stats__followers__lte=limit
+    )
+    pairs = followed.values_list('user_id', 'author_id').union(
+        Follow.objects.filter(
+            user__in=authors
+        ).values_list('user_id', 'author_id'),
+        readers.values_list('user_id', 'author_id'),
+        Follow.objects.filter(
+            user__in=readers.values('user_id')
+        ).values_list('user_id', 'author_id'),
+    )
+    popular = followed.filter(
+        author__stats__followers__gt=limit
+    ).values_list('author_id', flat=True)
+    return list(pairs), list(popular)
+
+
+def refresh(user_id):
+    """Пересчитывает подсказки пользователя после изменения подписок."""
+    pairs, popular = _neighbourhood(user_id)
+    graph = FollowGraph(pairs)
+    suggested = graph.suggest(user_id, {
+        graph.numbers[pk] for pk in popular if pk in graph.numbers
+    })
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id=user_id).delete()
+        FollowSuggestion.objects.bulk_create(
+            _suggestions(user_id, suggested)
+        )
+
+
+def for_user(user, size=None):
+    """Сохранённые подсказки пользователя, лучшие первыми."""
+    if not user.is_authenticated:
+        return []
+    size = size or settings.SUGGESTIONS_SHOWN
+    return [
+        suggestion.author for suggestion in FollowSuggestion.objects.filter(
+            user=user
+        ).select_related('author').order_by('-score', 'author_id')[:size]
+    ]
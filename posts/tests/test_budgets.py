@@ -0,0 +1,81 @@
+import json
+import os
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import seeding
+from posts.models import Group, Post, User
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'budgets.json')
+
+
+class BudgetTest(TestCase):
+    '''Страницы укладываются в бюджеты из budgets.json.'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(BUDGETS_PATH, encoding='utf-8') as file:
+            cls.budgets = json.load(file)
+
+    def urls(self):
+        '''Адреса страниц и посетители для текущего набора данных.'''
+        author = User.objects.order_by('-stats__posts', 'pk').first()
+        reader = User.objects.order_by('-stats__following', 'pk').first()
+        post = Post.objects.filter(author=author).latest('pub_date')
+        group = Group.objects.order_by('pk').first()
+        visitors = {'guest': Client(), 'reader': Client(), 'author': Client()}
+        visitors['reader'].force_login(reader)
+        visitors['author'].force_login(author)
+        urls = {
+            'index': reverse('index'),
+            'group': reverse('group', args=(group.slug,)),
+            'profile': reverse('profile', args=(author.username,)),
+            'post': reverse('post', args=(author.username, post.pk)),
+            'trending': reverse('trending'),
+            'follow_index': reverse('follow_index'),
+            'post_edit': reverse('post_edit', args=(author.username, post.pk)),
+            'new_post': reverse('new_post'),
+        }
+        return visitors, urls
+
+    def measure(self, client, url):
+        '''Число запросов и лучшее время ответа без кэша.'''
+        timings = []
+        for _ in range(self.budgets['repeat']):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.assertEqual(response.status_code, 200, url)
+        return queries, min(timings)
+
+    def test_views_within_budgets(self):
+        for dataset in self.budgets['datasets']:
+            with transaction.atomic():
+                seeding.seed(**dataset)
+                visitors, urls = self.urls()
+                self.assertEqual(urls.keys(), self.budgets['views'].keys())
+                for name, budget in self.budgets['views'].items():
+                    with self.subTest(view=name, posts=dataset['posts']):
+                        queries, render_ms = self.measure(
+                            visitors[budget['visitor']], urls[name]
+                        )
+                        self.assertLessEqual(
+                            len(queries), budget['queries'],
+                            'Запросы сверх бюджета:\n' + '\n'.join(
+                                query['sql']
+                                for query in queries.captured_queries
+                            )
+                        )
+                        self.assertLessEqual(
+                            render_ms, budget['render_ms'],
+                            f'{name}: {render_ms:.1f} мс сверх бюджета'
+                        )
+                transaction.set_rollback(True)
@@ -0,0 +1,254 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+CARD_BODY = 'posts/includes/post_item_body.html'
+
+
+class PostCardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Старое название',
+            slug='test-slug',
+            description='description group'
+        )
+        self.post = Post.objects.create(
+            text='Текст', author=self.author, group=self.group
+        )
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_card_is_rendered_once(self):
+        '''Повторный показ карточки берётся из кэша.'''
+        response = self.reader_client.get(reverse('index'))
+        self.assertTemplateUsed(response, CARD_BODY)
+
+        response = self.reader_client.get(reverse('index'))
+        self.assertTemplateNotUsed(response, CARD_BODY)
+        self.assertContains(response, 'Текст')
+
+    def test_edit_button_is_not_cached(self):
+        '''Кнопка редактирования зависит от читателя, а не от кэша.'''
+        response = self.author_client.get(reverse('index'))
+        self.assertContains(response, 'Редактировать')
+
+        response = self.reader_client.get(reverse('index'))
+        self.assertTemplateNotUsed(response, CARD_BODY)
+        self.assertNotContains(response, 'Редактировать')
+
+    def test_changes_invalidate_card(self):
+        '''Правка записи, комментарий и переименование группы видны сразу.'''
+        self.reader_client.get(reverse('index'))
+
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        response = self.reader_client.get(reverse('index'))
+        self.assertContains(response, 'Комментариев: 1')
+
+        self.post.text = 'Новый текст'
+        self.post.save()
+        response = self.reader_client.get(reverse('index'))
+        self.assertContains(response, 'Новый текст')
+
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.reader_client.get(reverse('index'))
+        self.assertContains(response, 'Новое название')
+
+        self.author.username = 'renamed'
+        self.author.save()
+        response = self.reader_client.get(reverse('index'))
+        self.assertContains(response, '@renamed')
+
+
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='title group',
+            slug='test-slug',
+            description='description group'
+        )
+        self.post = Post.objects.create(
+            text='Первая запись', author=self.author, group=self.group
+        )
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('index'),
+            reverse('group', args=(self.group.slug,)),
+            reverse('profile', args=(self.author,)),
+            reverse('post', args=(self.author, self.post.pk)),
+        )
+
+    def test_guest_pages_are_cached(self):
+        '''Повторный запрос анонима обходится без базы.'''
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Cookie', response['Vary'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_per_process_cache_disables_pages(self):
+        '''С кэшем в памяти процесса страницы и ETag не кэшируются.'''
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                response = self.guest_client.get(url)
+                self.assertIsNotNone(response.context)
+                self.assertFalse(response.has_header('ETag'))
+
+    def test_authorized_pages_are_not_cached(self):
+        '''Авторизованному пользователю страница строится заново.'''
+        self.reader_client.get(self.urls[0])
+
+        response = self.reader_client.get(self.urls[0])
+
+        self.assertIsNotNone(response.context)
+
+    def test_writes_invalidate_pages(self):
+        '''Изменения сбрасывают кэш только зависящих от них страниц.'''
+        for url in self.urls:
+            self.guest_client.get(url)
+
+        Post.objects.create(text='Вторая запись', author=self.author,
+                            group=self.group)
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Вторая запись')
+
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Свежий комментарий')
+        self.assertContains(self.guest_client.get(self.urls[3]),
+                            'Свежий комментарий')
+
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.guest_client.get(self.urls[2]),
+                            'Подписчиков: 1')
+
+        self.guest_client.get(self.urls[0])
+        other = Group.objects.create(title='Другая', slug='other')
+        self.guest_client.get(reverse('group', args=(other.slug,)))
+        with self.assertNumQueries(0):
+            self.guest_client.get(self.urls[0])
+        self.post.group = other
+        self.post.save()
+        self.assertNotContains(self.guest_client.get(self.urls[1]),
+                               'Первая запись')
+        self.assertContains(
+            self.guest_client.get(reverse('group', args=(other.slug,))),
+            'Первая запись'
+        )
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='title group',
+            slug='test-slug',
+            description='description group'
+        )
+        self.post = Post.objects.create(
+            text='Первая запись', author=self.author, group=self.group
+        )
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('index'),
+            reverse('group', args=(self.group.slug,)),
+            reverse('profile', args=(self.author,)),
+            reverse('post', args=(self.author, self.post.pk)),
+        )
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        '''Неизменившаяся страница отдаётся ответом 304 без запросов.'''
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_authorized_not_modified(self):
+        '''Пользователю 304 отдаётся без построения страницы.'''
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(self.reader_client, url)
+                self.assertEqual(response.status_code, 304)
+                self.assertIsNone(response.context)
+                self.assertIn('private', response['Cache-Control'])
+
+    def test_etag_depends_on_viewer(self):
+        '''У анонима и пользователя разные ETag одной страницы.'''
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_changes_reset_etag(self):
+        '''Изменение данных страницы меняет её ETag.'''
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Свежий комментарий')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_follow_resets_etag(self):
+        '''Подписка меняет ETag ленты подписок и профиля автора.'''
+        urls = (
+            reverse('follow_index'),
+            reverse('profile', args=(self.author,)),
+        )
+        etags = {url: self.reader_client.get(url)['ETag'] for url in urls}
+        self.reader_client.get(reverse('profile_follow', args=(self.author,)))
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Первая запись')
+
+    def test_missing_page_has_no_etag(self):
+        '''Ответ 404 не получает ETag.'''
+        response = self.guest_client.get(reverse('profile', args=('nobody',)))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
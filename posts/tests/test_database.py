@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+
+from posts import search
+from posts.models import Post
+from yatube.routers import ReplicaRouter, _use_replica
+
+
+class SQLiteSettingsTest(TestCase):
+    def test_pragmas_applied(self):
+        '''Новое соединение получает PRAGMA из настроек базы.'''
+        pragmas = connection.settings_dict['PRAGMAS']
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], pragmas['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            # NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class SQLiteSchemaTest(TransactionTestCase):
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+            )
+            return sorted(cursor.fetchall())
+
+    def test_remake_table_keeps_triggers(self):
+        '''Пересоздание таблицы в миграции не теряет триггеры поиска.'''
+        triggers = self.triggers()
+        with connection.schema_editor() as editor:
+            editor._remake_table(Post)
+        self.assertEqual(self.triggers(), triggers)
+        if search.fts_enabled():
+            author = get_user_model().objects.create(username='author')
+            post = Post.objects.create(text='Триггеры', author=author)
+            self.assertEqual(list(search.search('триггеры')), [post])
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_without_replicas(self):
+        '''Без реплик всё идёт в основную базу.'''
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_reads_go_to_replica(self):
+        '''Чтение идёт на реплику, запись и миграции - в основную базу.'''
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        token = _use_replica.set(True)
+        self.addCleanup(_use_replica.reset, token)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        post, other = Post(), Post()
+        post._state.db, other._state.db = 'default', 'replica'
+        self.assertTrue(self.router.allow_relation(post, other))
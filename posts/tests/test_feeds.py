@@ -0,0 +1,151 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='title group',
+            slug='test-slug',
+            description='description group'
+        )
+        self.post = Post.objects.create(
+            text='Запись <b>в группе</b>', author=self.author,
+            group=self.group,
+        )
+        Post.objects.create(text='Запись без группы', author=self.other)
+        self.guest_client = Client()
+
+    def get(self, url):
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        return response, ElementTree.fromstring(content)
+
+    def atom_titles(self, url):
+        _, feed = self.get(url)
+        return [
+            entry.find(f'{ATOM}title').text
+            for entry in feed.iter(f'{ATOM}entry')
+        ]
+
+    def test_feeds(self):
+        '''Ленты сайта, группы и автора содержат только свои записи.'''
+        feeds = {
+            reverse('site_feed', args=('atom',)): [
+                'Запись без группы', 'Запись <b>в группе</b>',
+            ],
+            reverse('group_feed', args=(self.group.slug, 'atom')): [
+                'Запись <b>в группе</b>',
+            ],
+            reverse('profile_feed', args=(self.other.username, 'atom')): [
+                'Запись без группы',
+            ],
+        }
+        for url, titles in feeds.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.atom_titles(url), titles)
+
+    def test_rss(self):
+        '''Лента RSS со ссылками на страницы записей.'''
+        response, feed = self.get(
+            reverse('group_feed', args=(self.group.slug, 'rss'))
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/rss+xml; charset=utf-8'
+        )
+        item = feed.find('channel/item')
+        self.assertEqual(
+            item.find('link').text,
+            'http://testserver' + reverse(
+                'post', args=(self.author.username, self.post.pk)
+            )
+        )
+        self.assertEqual(item.find('category').text, 'title group')
+        self.assertNotIn('<b>', item.find('description').text)
+
+    def test_missing(self):
+        '''Неизвестный формат, группа или автор дают 404.'''
+        for url in (
+            reverse('site_feed', args=('json',)),
+            reverse('group_feed', args=('missing', 'atom')),
+            reverse('profile_feed', args=('nobody', 'rss')),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(FEED_SIZE=1)
+    def test_size(self):
+        '''В ленте не больше FEED_SIZE последних записей.'''
+        self.assertEqual(
+            self.atom_titles(reverse('site_feed', args=('atom',))),
+            ['Запись без группы'],
+        )
+
+    def test_cached(self):
+        '''Повторный запрос ленты обходится без базы.'''
+        url = reverse('site_feed', args=('atom',))
+        first, _ = self.get(url)
+        with self.assertNumQueries(0):
+            response, _ = self.get(url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Type'], first['Content-Type'])
+
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_invalidates(self):
+        '''Новая запись сразу появляется в лентах.'''
+        urls = (
+            reverse('site_feed', args=('atom',)),
+            reverse('profile_feed', args=(self.author.username, 'atom')),
+            reverse('group_feed', args=(self.group.slug, 'atom')),
+        )
+        etags = {url: self.get(url)[0]['ETag'] for url in urls}
+        Post.objects.create(
+            text='Свежая запись', author=self.author, group=self.group
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.atom_titles(url)[0], 'Свежая запись')
+
+    def test_page_links_feed(self):
+        '''Страницы группы и автора ссылаются на свои ленты.'''
+        response = self.guest_client.get(
+            reverse('group', args=(self.group.slug,))
+        )
+        self.assertContains(
+            response, reverse('group_feed', args=(self.group.slug, 'atom'))
+        )
+        self.assertContains(response, reverse('site_feed', args=('atom',)))
+        response = self.guest_client.get(
+            reverse('profile', args=(self.author.username,))
+        )
+        self.assertContains(
+            response,
+            reverse('profile_feed', args=(self.author.username, 'atom'))
+        )
@@ -66,7 +66,7 @@ class PostCreateFormTests(TestCase):
                 text='Тестовый текст',
                 group=PostCreateFormTests.group.id,
                 author=self.user,
-                image='posts/small.gif'
+                image='posts/small.webp'
             ).exists()
         )
         self.assertEqual(add_post.status_code, 200)
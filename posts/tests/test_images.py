@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images
+from posts.models import Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def photo(size=(3000, 1000), orientation=None):
+    '''JPEG как с камеры телефона: с EXIF и, возможно, поворотом.'''
+    image = Image.new('RGB', size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = 'Телефон'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    output = BytesIO()
+    image.save(output, 'JPEG', exif=exif.tobytes())
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, content, name='photo.jpg'):
+        return self.client.post(reverse('new_post'), {
+            'text': 'Запись с картинкой',
+            'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+        })
+
+    def test_image_reencoded(self):
+        '''Картинка уменьшается, перекодируется и теряет метаданные.'''
+        response = self.upload(photo())
+        self.assertRedirects(response, reverse('index'))
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, f'posts/photo.{images.EXTENSION}')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, images.FORMAT)
+            self.assertEqual(image.width, settings.POST_IMAGE_MAX_SIDE)
+            self.assertAlmostEqual(image.height, image.width / 3, delta=1)
+            self.assertFalse(image.getexif())
+
+    def test_orientation_applied(self):
+        '''Поворот из EXIF применяется к точкам картинки.'''
+        content = images.encode(photo((300, 100), orientation=6), 2048)
+        with Image.open(BytesIO(content)) as image:
+            self.assertEqual(image.size, (100, 300))
+            self.assertFalse(image.getexif())
+
+    @override_settings(IMAGE_WORKERS=0)
+    def test_encoded_in_server_process(self):
+        '''Без пула картинка перекодируется в процессе сервера.'''
+        self.upload(photo((100, 100)), name='small.jpg')
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.format, images.FORMAT)
+
+    @override_settings(UPLOAD_MAX_BYTES=1024)
+    def test_oversized_upload_rejected(self):
+        '''Слишком большой файл отклоняется с ошибкой формы.'''
+        response = self.upload(photo((500, 500)))
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 1,0\xa0КБ'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_broken_image_rejected(self):
+        '''Обрезанный файл не сохраняется.'''
+        response = self.upload(photo()[:2000])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,67 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube import metrics
+
+User = get_user_model()
+
+
+@override_settings(METRICS_SAMPLE_RATE=1)
+class MetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(text='Текст', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.guest_client = Client()
+
+    def get_record(self, url):
+        with self.assertLogs('yatube.metrics', 'INFO') as logs:
+            self.guest_client.get(url)
+        self.assertEqual(len(logs.records), 1)
+        return json.loads(logs.records[0].getMessage())
+
+    def test_request_metrics(self):
+        '''Запрос пишет в журнал представление, запросы, шаблоны и кэш.'''
+        record = self.get_record(reverse('index'))
+        self.assertEqual(record['view'], 'index')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 2)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreaterEqual(record['duration_ms'], record['template_ms'])
+        self.assertGreater(record['cache_misses'], 0)
+        # страница для гостя берётся из кэша без запросов к базе
+        record = self.get_record(reverse('index'))
+        self.assertEqual(record['queries'], 0)
+        self.assertEqual(record['template_ms'], 0)
+        self.assertGreater(record['cache_hits'], 0)
+        self.assertEqual(metrics.snapshot()['index']['count'], 2)
+        self.assertEqual(metrics.snapshot()['index']['queries'], 2)
+
+    def test_get_many_counted_once(self):
+        '''Ключи get_many считаются по одному разу.'''
+        metrics.install()
+        cache.set('present', 1)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics._current.set(request_metrics)
+        try:
+            cache.get_many(['present', 'absent', 'other'])
+        finally:
+            metrics._current.reset(token)
+        self.assertEqual(request_metrics.cache_hits, 1)
+        self.assertEqual(request_metrics.cache_misses, 2)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling(self):
+        '''Запросы вне выборки не измеряются.'''
+        self.guest_client.get(reverse('index'))
+        self.assertEqual(metrics.snapshot(), {})
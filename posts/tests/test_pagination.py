@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='title group',
+            slug='test-slug',
+            description='description group'
+        )
+        Post.objects.bulk_create(Post(
+            text=f'Текст {i}',
+            author=cls.author,
+            group=cls.group
+        ) for i in range(25))
+        # одинаковые даты проверяют добор порядка по pk
+        Post.objects.filter(pk__in=Post.objects.values('pk')[5:15]).update(
+            pub_date=timezone.now()
+        )
+        cls.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def walk(self, url):
+        '''Проходит список по курсорам вперёд и обратно.'''
+        response = self.guest_client.get(url)
+        pages = [list(response.context['page'])]
+        cursor = response.context['page'].next_cursor
+        while cursor:
+            response = self.guest_client.get(url, {'cursor': cursor})
+            pages.append(list(response.context['page']))
+            cursor = response.context['page'].next_cursor
+        backward = [list(response.context['page'])]
+        cursor = response.context['page'].previous_cursor
+        while cursor:
+            response = self.guest_client.get(url, {'cursor': cursor})
+            backward.append(list(response.context['page']))
+            cursor = response.context['page'].previous_cursor
+        return pages, backward[::-1]
+
+    def test_cursor_walk_matches_ordering(self):
+        '''Курсоры обходят все записи без пропусков и повторов.'''
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.author}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                forward, backward = self.walk(url)
+                self.assertEqual(sum(forward, []), self.expected)
+                self.assertEqual(forward, backward)
+                self.assertEqual([len(page) for page in forward], [10, 10, 5])
+
+    def test_follow_index_cursor(self):
+        '''Лента подписок листается по курсору.'''
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        self.guest_client.force_login(reader)
+
+        forward, _ = self.walk(reverse('follow_index'))
+
+        self.assertEqual(sum(forward, []), self.expected)
+
+    def test_invalid_cursor(self):
+        '''Испорченный курсор даёт 404.'''
+        for cursor in ('garbage', 'WyJuIiwgWzFdXQ', 'WyJuIiwgWyJ4IiwgIngiXV0'):
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(
+                    reverse('index'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,81 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import seeding
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'планы запросов SQLite')
+class ListQueryPlansTest(TestCase):
+    '''Списки страниц читаются по индексам, без сортировки в памяти.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        seeding.seed(users=20, groups=3, posts=300, comments=600, follows=5)
+        cls.author = User.objects.order_by('-stats__posts', 'pk').first()
+        cls.reader = User.objects.order_by('-stats__following', 'pk').first()
+        cls.group = Group.objects.order_by('pk').first()
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedLists(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            # число записей для номеров страниц считается по всей выборке
+            if not sql.startswith('SELECT') or 'COUNT(*)' in sql:
+                continue
+            plan = self.plan(sql)
+            with self.subTest(url=url, sql=sql[:80]):
+                self.assertFalse(
+                    [step for step in plan if 'TEMP B-TREE' in step], plan
+                )
+                self.assertFalse(
+                    [step for step in plan if step.startswith('SCAN')
+                     and 'INDEX' not in step], plan
+                )
+        return response
+
+    def test_list_pages(self):
+        urls = (
+            reverse('index'),
+            reverse('group', args=(self.group.slug,)),
+            reverse('profile', args=(self.author.username,)),
+            reverse('post', args=(self.author.username, self.post.pk)),
+            reverse('follow_index'),
+            reverse('trending'),
+            reverse('group_trending', args=(self.group.slug,)),
+        )
+        for url in urls:
+            response = self.assertIndexedLists(url)
+            # следующие страницы читаются по курсору
+            page = response.context.get('page')
+            if page is not None and getattr(page, 'next_cursor', None):
+                self.assertIndexedLists(f'{url}?cursor={page.next_cursor}')
+
+    def test_feeds(self):
+        for url in (
+            reverse('site_feed', args=('atom',)),
+            reverse('group_feed', args=(self.group.slug, 'rss')),
+            reverse('profile_feed', args=(self.author.username, 'atom')),
+        ):
+            self.assertIndexedLists(url)
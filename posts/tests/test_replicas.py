@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.routers import PIN_COOKIE
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    '''Реплика - копия основной базы в отдельном файле SQLite.
+
+    Копия снимается вручную, поэтому всё, что записано после снимка,
+    есть только в основной базе, как при отставании реплики.
+    '''
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.replica_path = os.path.join(directory.name, 'replica.sqlite3')
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': self.replica_path,
+        }
+        self.addCleanup(self.remove_replica)
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Post.objects.create(text='Старая запись', author=self.author)
+        self.sync_replica()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def remove_replica(self):
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+
+    def sync_replica(self):
+        connections['replica'].close()
+        connections['default'].ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        connections['default'].connection.backup(target)
+        target.close()
+
+    def test_feed_reads_from_replica(self):
+        '''Ленты читаются с реплики и не видят записей после снимка.'''
+        Post.objects.create(text='Свежая запись', author=self.author)
+        for client in (self.guest_client, self.reader_client):
+            response = client.get(reverse('index'))
+            self.assertContains(response, 'Старая запись')
+            self.assertNotContains(response, 'Свежая запись')
+        # сессия после снимка есть только в основной базе
+        self.assertTrue(response.context['user'].is_authenticated)
+
+    def test_writer_reads_own_writes(self):
+        '''После записи пользователь читает из основной базы.'''
+        response = self.reader_client.post(
+            reverse('new_post'), {'text': 'Моя запись'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.reader_client.get(reverse('index'))
+        self.assertContains(response, 'Моя запись')
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotContains(response, 'Моя запись')
+
+    def test_follow_pins_primary(self):
+        '''Подписка по GET тоже закрепляет пользователя за основной базой.'''
+        response = self.reader_client.get(
+            reverse('profile_follow', args=(self.author,))
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.reader_client.get(reverse('follow_index'))
+        self.assertContains(response, 'Старая запись')
+
+    def test_other_views_use_primary(self):
+        '''Непомеченные представления читают из основной базы.'''
+        post = Post.objects.create(text='Свежая запись', author=self.author)
+        self.assertEqual(Post.objects.get(pk=post.pk), post)
+        response = self.reader_client.get(
+            reverse('post_edit', args=(self.author, post.pk))
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_lagging_replica_pages_not_cached(self):
+        '''Страница с реплики сразу после изменения не кэшируется.'''
+        Post.objects.create(text='Свежая запись', author=self.author)
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotContains(response, 'Свежая запись')
+        self.assertFalse(response.has_header('ETag'))
+        self.sync_replica()
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Свежая запись')
+
+    @override_settings(DATABASE_PIN_SECONDS=0)
+    def test_replica_pages_cached_after_lag(self):
+        '''Когда реплика догнала изменения, страница кэшируется.'''
+        self.guest_client.get(reverse('index'))
+        with self.assertNumQueries(0, using='replica'):
+            response = self.guest_client.get(reverse('index'))
+        self.assertTrue(response.has_header('ETag'))
@@ -0,0 +1,128 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post, SearchTerm
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Рыбалка',
+            slug='fishing',
+            description='description group'
+        )
+        cls.in_text = Post.objects.create(
+            text='Ловим щуку на спиннинг, щука клюёт на рассвете',
+            author=cls.author,
+        )
+        cls.in_group = Post.objects.create(
+            text='Поймали окуня',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.other = Post.objects.create(
+            text='Совсем о другом',
+            author=User.objects.create_user(username='other'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def found(self, query):
+        return list(search.search(query).order_by('search_rank', 'pk'))
+
+    def test_search_text_group_and_author(self):
+        '''Поиск находит записи по тексту, группе и имени автора.'''
+        self.assertEqual(self.found('щуку'), [self.in_text])
+        self.assertEqual(self.found('рыбалка'), [self.in_group])
+        self.assertCountEqual(
+            self.found('толстой'), [self.in_text, self.in_group]
+        )
+        self.assertEqual(self.found('окуня рыбалка'), [self.in_group])
+        self.assertEqual(self.found('щуку рыбалка'), [])
+        self.assertEqual(self.found('  '), [])
+
+    def test_query_syntax_is_escaped(self):
+        '''Операторы FTS5 в запросе считаются обычными словами.'''
+        self.assertEqual(self.found('щуку OR "окуня'), [])
+        self.assertEqual(self.found('"щуку*'), [self.in_text])
+
+    def test_index_follows_renames(self):
+        '''Индекс обновляется при правке записи, группы и автора.'''
+        in_text = Post.objects.get(pk=self.in_text.pk)
+        in_text.text = 'Ловим карпа'
+        in_text.save()
+        self.assertEqual(self.found('щуку'), [])
+        self.assertEqual(self.found('карпа'), [self.in_text])
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Охота'
+        group.save()
+        self.assertEqual(self.found('рыбалка'), [])
+        self.assertEqual(self.found('охота'), [self.in_group])
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'leo'
+        author.save()
+        self.assertCountEqual(
+            self.found('leo'), [self.in_text, self.in_group]
+        )
+        Post.objects.filter(pk=self.in_group.pk).delete()
+        self.assertEqual(self.found('leo'), [self.in_text])
+
+    def test_search_page(self):
+        '''Страница поиска показывает найденные записи.'''
+        response = self.guest_client.get(reverse('search'), {'q': 'окуня'})
+        self.assertEqual(list(response.context['page']), [self.in_group])
+        self.assertEqual(response.context['q'], 'окуня')
+        response = self.guest_client.get(reverse('search'))
+        self.assertEqual(list(response.context['page']), [])
+
+    def test_cursor_walk_keeps_rank_order(self):
+        '''Курсоры поиска идут в порядке релевантности.'''
+        Post.objects.bulk_create(Post(
+            text='окунь ' * (i % 4 + 1) + f'запись {i}',
+            author=self.author,
+        ) for i in range(25))
+        expected = list(
+            search.search('окунь').order_by('search_rank', 'pk')
+        )
+        url = reverse('search')
+        response = self.guest_client.get(url, {'q': 'окунь'})
+        self.assertIn('q=%D0%BE', response.content.decode())
+        found = list(response.context['page'])
+        cursor = response.context['page'].next_cursor
+        while cursor:
+            response = self.guest_client.get(
+                url, {'q': 'окунь', 'cursor': cursor}
+            )
+            found += response.context['page']
+            cursor = response.context['page'].next_cursor
+        self.assertEqual(len(expected), 25)
+        self.assertEqual(found, expected)
+
+    @mock.patch('posts.search.fts_enabled', return_value=False)
+    def test_fallback_index(self, fts_enabled):
+        '''Без FTS5 поиск идёт по обратному индексу слов.'''
+        search.index_posts(Post.objects.all())
+        self.assertTrue(
+            SearchTerm.objects.filter(term='щука', post=self.in_text).exists()
+        )
+        self.assertEqual(self.found('щуку'), [self.in_text])
+        self.assertEqual(self.found('толстой окуня'), [self.in_group])
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Охота'
+        group.save()
+        self.assertEqual(self.found('охота'), [self.in_group])
+        self.assertEqual(self.found('рыбалка'), [])
@@ -0,0 +1,26 @@
+from django.test import TestCase
+
+from posts import search, seeding
+from posts.models import Follow, Post, TimelineEntry, UserStats
+
+
+class SeedTest(TestCase):
+    def test_seed_builds_derived_data(self):
+        '''Набор данных для замеров согласован со счётчиками и лентами.'''
+        sizes = seeding.seed(users=10, groups=2, posts=50, comments=30,
+                             follows=3)
+        self.assertEqual(sizes['users'], 10)
+        self.assertEqual(sizes['posts'], 50)
+        self.assertEqual(sizes['comments'], 30)
+        self.assertGreater(sizes['follows'], 0)
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts', flat=True)), 50
+        )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=follow.user_id).count(),
+            Post.objects.filter(
+                author__following__user=follow.user_id
+            ).count()
+        )
+        self.assertTrue(search.search(seeding.WORDS[0]).exists())
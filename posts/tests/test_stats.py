@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, UserStats
+
+User = get_user_model()
+
+
+class UserStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for name, value in expected.items():
+            with self.subTest(user=user, counter=name):
+                self.assertEqual(getattr(stats, name), value)
+
+    def test_counters_follow_write_paths(self):
+        '''Счётчики меняются вместе с записями, комментариями и подписками.'''
+        post = Post.objects.create(text='Текст', author=self.author)
+        Comment.objects.create(post=post, author=self.user, text='Ок')
+        self.client.get(reverse('profile_follow', args=(self.author,)))
+
+        self.assertStats(self.author, followers=1, following=0, posts=1)
+        self.assertStats(self.user, followers=0, following=1, comments=1)
+
+        self.client.get(reverse('profile_unfollow', args=(self.author,)))
+        post.delete()
+
+        self.assertStats(self.author, followers=0, posts=0)
+        self.assertStats(self.user, following=0, comments=0)
+
+    def test_delete_user_with_posts(self):
+        '''Пользователь с записями и комментариями удаляется.'''
+        post = Post.objects.create(text='Текст', author=self.user)
+        Comment.objects.create(post=post, author=self.user, text='Ок')
+        other = Post.objects.create(text='Чужой', author=self.author)
+        Comment.objects.create(post=other, author=self.user, text='Ок')
+
+        pk = self.user.pk
+        self.user.delete()
+
+        self.assertFalse(UserStats.objects.filter(user_id=pk).exists())
+        self.assertStats(self.author, posts=1, comments=0)
+
+    def test_rebuild_stats_command(self):
+        '''Команда rebuild_stats восстанавливает счётчики.'''
+        Post.objects.bulk_create(
+            Post(text='Текст', author=self.author) for _ in range(3)
+        )
+        UserStats.objects.filter(user=self.user).delete()
+
+        call_command('rebuild_stats', stdout=StringIO())
+
+        self.assertStats(self.author, posts=3)
+        self.assertStats(self.user, posts=0)
+
+    def test_profile_shows_counters(self):
+        '''Карточка автора выводит счётчики из UserStats.'''
+        Post.objects.create(text='Текст', author=self.author)
+        self.client.get(reverse('profile_follow', args=(self.author,)))
+
+        response = self.client.get(reverse('profile', args=(self.author,)))
+
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, 'Записей: 1')
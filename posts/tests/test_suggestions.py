@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import suggestions
+from posts.models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class SuggestionsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'writer', 'neighbour', 'poet')
+        }
+        # friend подписан на writer, а neighbour читает того же friend
+        # и ещё poet
+        for user, author in (
+            ('friend', 'writer'),
+            ('neighbour', 'friend'),
+            ('neighbour', 'poet'),
+        ):
+            self.follow(user, author)
+        self.follow('reader', 'friend')
+
+    def follow(self, user, author):
+        return Follow.objects.create(
+            user=self.users[user], author=self.users[author]
+        )
+
+    def stored(self, name):
+        return [
+            (suggestion.author.username, suggestion.score)
+            for suggestion in FollowSuggestion.objects.filter(
+                user=self.users[name]
+            ).order_by('-score', 'author_id')
+        ]
+
+    def test_rebuild(self):
+        '''Друзья друзей и похожие читатели, без себя и своих подписок.'''
+        suggestions.rebuild()
+        self.assertEqual(self.stored('reader'), [
+            ('writer', 1.0), ('poet', 0.5),
+        ])
+        self.assertEqual(self.stored('neighbour'), [('writer', 1.0)])
+        self.assertEqual(self.stored('writer'), [])
+
+    def test_refresh_matches_rebuild(self):
+        '''Пересчёт одного пользователя совпадает с пересчётом графа.'''
+        suggestions.rebuild()
+        expected = {name: self.stored(name) for name in self.users}
+        FollowSuggestion.objects.all().delete()
+        for user in self.users.values():
+            suggestions.refresh(user.pk)
+        for name in self.users:
+            with self.subTest(name=name):
+                self.assertEqual(self.stored(name), expected[name])
+
+    @override_settings(SUGGESTIONS_MAX_FOLLOWERS=1)
+    def test_popular_authors_skipped(self):
+        '''Через популярных авторов похожие читатели не ищутся.'''
+        suggestions.rebuild()
+        self.assertEqual(self.stored('reader'), [('writer', 1.0)])
+        suggestions.refresh(self.users['reader'].pk)
+        self.assertEqual(self.stored('reader'), [('writer', 1.0)])
+
+    def test_follow_updates_suggestions(self):
+        '''Подписка и отписка сразу пересчитывают подсказки читателя.'''
+        self.assertEqual(self.stored('reader'), [
+            ('writer', 1.0), ('poet', 0.5),
+        ])
+        self.follow('reader', 'writer')
+        self.assertEqual(self.stored('reader'), [('poet', 0.5)])
+        Follow.objects.filter(user=self.users['reader']).delete()
+        self.assertEqual(self.stored('reader'), [])
+
+    def test_command(self):
+        '''Команда пересчитывает подсказки всех пользователей.'''
+        FollowSuggestion.objects.all().delete()
+        call_command('rebuild_suggestions', stdout=StringIO())
+        self.assertEqual(FollowSuggestion.objects.count(), 3)
+
+
+class SuggestionsPageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.stranger = User.objects.create_user(username='stranger')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_pages_read_stored_suggestions(self):
+        '''Страницы показывают сохранённые подсказки, граф не читается.'''
+        FollowSuggestion.objects.create(
+            user=self.reader, author=self.stranger, score=1.0
+        )
+        for url in (
+            reverse('follow_index'),
+            reverse('profile', args=(self.author.username,)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['suggestions'], [self.stranger]
+                )
+                self.assertContains(
+                    response,
+                    reverse('profile', args=(self.stranger.username,))
+                )
+
+    def test_guest(self):
+        '''Гостю подсказки не показываются.'''
+        response = Client().get(
+            reverse('profile', args=(self.author.username,))
+        )
+        self.assertEqual(response.context['suggestions'], [])
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='photo.png', size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(os.path.join(MEDIA_ROOT, 'posts'), ignore_errors=True)
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def variants(self):
+        directory = os.path.join(MEDIA_ROOT, 'posts', 'variants')
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+    def test_new_post_generates_variants(self):
+        '''После загрузки картинки копии уже готовы и видны в ленте.'''
+        self.client.post(
+            reverse('new_post'),
+            data={'text': 'Текст', 'image': make_image()}
+        )
+
+        post = Post.objects.get()
+        self.assertEqual(post.image_variants['image'], post.image.name)
+        self.assertEqual(self.variants(), [
+            'photo-320.jpeg', 'photo-320.webp',
+            'photo-640.jpeg', 'photo-640.webp',
+            'photo-960.jpeg', 'photo-960.webp',
+        ])
+        sources = post.image_sources()
+        self.assertEqual(
+            sources['webp']['srcset'],
+            '/media/posts/variants/photo-320.webp 320w, '
+            '/media/posts/variants/photo-640.webp 640w, '
+            '/media/posts/variants/photo-960.webp 960w',
+        )
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, sources['jpeg']['srcset'])
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_failure_keeps_post(self):
+        '''Ошибка создания копий не мешает сохранить запись.'''
+        with mock.patch(
+            'posts.thumbnails._render', side_effect=OSError('битый файл')
+        ), self.assertLogs('posts.thumbnails', 'ERROR'):
+            response = self.client.post(
+                reverse('new_post'),
+                data={'text': 'Текст', 'image': make_image()}
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Post.objects.get().image_variants)
+
+    def test_small_image(self):
+        '''Копии крупнее картинки не создаются, кроме самой маленькой.'''
+        self.client.post(
+            reverse('new_post'),
+            data={'text': 'Текст', 'image': make_image(size=(200, 100))}
+        )
+        self.assertEqual(self.variants(), ['photo-320.jpeg', 'photo-320.webp'])
+
+    def test_replaced_image(self):
+        '''Копии старой картинки удаляются вместе с ней из шаблонов.'''
+        self.client.post(
+            reverse('new_post'),
+            data={'text': 'Текст', 'image': make_image()}
+        )
+        post = Post.objects.get()
+        self.client.post(
+            reverse('post_edit', args=(self.user.username, post.pk)),
+            data={'text': 'Текст', 'image': make_image('other.png')}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants['image'], post.image.name)
+        self.assertTrue(all(
+            name.startswith('other-') for name in self.variants()
+        ))
+
+    def test_without_webp(self):
+        '''Без поддержки WebP в Pillow создаются и показываются только
+        копии в jpeg.'''
+        with mock.patch.object(
+            thumbnails, 'FORMATS', thumbnails.FORMATS[-1:]
+        ):
+            self.client.post(
+                reverse('new_post'),
+                data={'text': 'Текст', 'image': make_image()}
+            )
+        self.assertEqual(self.variants(), [
+            'photo-320.jpeg', 'photo-640.jpeg', 'photo-960.jpeg',
+        ])
+        response = self.client.get(reverse('index'))
+        self.assertContains(
+            response, Post.objects.get().image_sources()['jpeg']['srcset']
+        )
+        self.assertNotContains(response, 'image/webp')
+
+    def test_without_variants(self):
+        '''Пока копий нет, показывается исходная картинка.'''
+        post = Post.objects.create(
+            text='Текст', author=self.user, image=make_image()
+        )
+        self.assertEqual(post.image_sources(), {})
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, f'src="{post.image.url}"')
+
+    def test_generate_thumbnails_command(self):
+        '''Команда создаёт копии для уже сохранённых записей.'''
+        Post.objects.create(
+            text='Текст', author=self.user, image=make_image()
+        )
+        self.assertEqual(self.variants(), [])
+
+        call_command('generate_thumbnails', workers=0, stdout=StringIO())
+
+        self.assertEqual(len(self.variants()), 6)
+        self.assertTrue(Post.objects.get().image_sources())
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        '''Новая запись попадает в ленты подписчиков автора.'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Текст', author=self.author)
+        Post.objects.create(text='Чужой текст', author=self.other)
+
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=self.reader)
+                 .values_list('post', flat=True)),
+            [post.pk]
+        )
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        '''Подписка заполняет ленту, отписка очищает её.'''
+        Post.objects.create(text='Первый', author=self.author)
+        Post.objects.create(text='Второй', author=self.author)
+
+        self.client.get(reverse('profile_follow', args=(self.author,)))
+        self.assertEqual(self.reader.timeline.count(), 2)
+
+        self.client.get(reverse('profile_unfollow', args=(self.author,)))
+        self.assertEqual(self.reader.timeline.count(), 0)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_read_on_demand(self):
+        '''Записи популярного автора не раскладываются, но видны в ленте.'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Текст', author=self.author)
+
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(timeline.feed(self.reader)), [post])
+
+        response = self.client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page'].object_list), [post])
+
+
+@override_settings(
+    TIMELINE_FANOUT_LIMIT=3, TIMELINE_FANOUT_RESUME=2, TIMELINE_WORKERS=0
+)
+class PopularityTest(TransactionTestCase):
+    """Раскладка идёт после коммита, поэтому транзакции настоящие."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+
+    def follow(self, reader):
+        Follow.objects.create(user=reader, author=self.author)
+
+    def unfollow(self, reader):
+        Follow.objects.filter(user=reader, author=self.author).delete()
+
+    def test_threshold_hysteresis(self):
+        """Автор остаётся популярным до порога возврата."""
+        for reader in self.readers:
+            self.follow(reader)
+        post = Post.objects.create(text='Текст', author=self.author)
+        self.unfollow(self.readers[2])
+        self.assertTrue(timeline.is_popular(self.author.pk))
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(timeline.feed(self.readers[0])), [post])
+
+    def test_resumed_author_spreads_missed_posts(self):
+        """Вернувшийся к раскладке автор раскладывает только записи,
+        вышедшие без раскладки."""
+        self.follow(self.readers[0])
+        self.follow(self.readers[1])
+        fanned_out = Post.objects.create(text='Старая', author=self.author)
+        self.follow(self.readers[2])
+        missed = Post.objects.create(text='Новая', author=self.author)
+        self.unfollow(self.readers[2])
+        inserted = []
+
+        def bulk_insert(entries, original=timeline._bulk_insert):
+            entries = list(entries)
+            inserted.extend((entry.user_id, entry.post_id)
+                            for entry in entries)
+            original(entries)
+
+        with mock.patch.object(timeline, '_bulk_insert', bulk_insert):
+            self.unfollow(self.readers[1])
+
+        self.assertFalse(timeline.is_popular(self.author.pk))
+        self.assertEqual(inserted, [(self.readers[0].pk, missed.pk)])
+        self.assertEqual(
+            list(timeline.feed(self.readers[0])), [missed, fanned_out]
+        )
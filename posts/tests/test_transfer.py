@@ -0,0 +1,156 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев'
+        )
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='title group',
+            slug='test-slug',
+            description='description group'
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f'Текст {i}',
+                author=self.author,
+                group=self.group if i % 2 else None
+            )
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Ок'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'dump.jsonl')
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'text', 'pub_date', 'author__username', 'group__slug'
+            )),
+            list(Comment.objects.values_list(
+                'pk', 'post_id', 'author__username', 'text', 'created'
+            )),
+            list(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            list(User.objects.order_by('username').values_list(
+                'username', 'first_name'
+            )),
+        )
+
+    def clear(self):
+        Comment.objects.all().delete()
+        Follow.objects.all().delete()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_export_import_round_trip(self):
+        '''Загрузка выгрузки восстанавливает данные, ленты и счётчики.'''
+        expected = self.snapshot()
+        call_command('export_jsonl', self.path, stderr=StringIO())
+        self.clear()
+        call_command('import_jsonl', self.path, batch_size=2,
+                     stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        reader = User.objects.get(username='reader')
+        self.assertFalse(reader.has_usable_password())
+        self.assertEqual(reader.stats.following, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), 5
+        )
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+        # повторная загрузка ничего не дублирует
+        call_command('import_jsonl', self.path,
+                     stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        new = Post.objects.create(text='Новая', author=reader)
+        self.assertGreater(new.pk, expected[0][-1][0])
+
+    def test_resume_after_failure(self):
+        '''Прерванная загрузка продолжается с сохранённой строки.'''
+        expected = self.snapshot()
+        call_command('export_jsonl', self.path, stderr=StringIO())
+        with open(self.path) as file:
+            lines = file.readlines()
+        broken = lines[:5] + ['{"model": "unknown"}\n'] + lines[5:]
+        with open(self.path, 'w') as file:
+            file.writelines(broken)
+        self.clear()
+        with self.assertRaises(CommandError):
+            call_command('import_jsonl', self.path, batch_size=2)
+        with open(f'{self.path}.checkpoint') as file:
+            self.assertEqual(int(file.read()), 3)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 0)
+        with open(self.path, 'w') as file:
+            file.writelines(broken[:5] + ['\n'] + lines[5:])
+        call_command('import_jsonl', self.path, resume=True,
+                     stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_missing_users_are_created(self):
+        '''Авторы, которых нет в файле и в базе, создаются.'''
+        with open(self.path, 'w') as file:
+            file.write(json.dumps({
+                'model': 'post', 'id': 100, 'text': 'Текст',
+                'pub_date': '2020-01-01T00:00:00Z', 'image': '',
+                'author': 'stranger', 'group': None,
+            }) + '\n')
+        call_command('import_jsonl', self.path,
+                     stdout=StringIO())
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.author.username, 'stranger')
+        self.assertEqual(post.pub_date.year, 2020)
+
+    def test_id_collision_stops_import(self):
+        '''Запись с занятым в базе id не подменяется чужой.'''
+        call_command('export_jsonl', self.path, stderr=StringIO())
+        self.clear()
+        local = Post.objects.create(
+            pk=self.posts[0].pk, text='Местная запись',
+            author=User.objects.create_user(username='local'),
+        )
+        with self.assertRaises(CommandError):
+            call_command('import_jsonl', self.path, stdout=StringIO())
+        local.refresh_from_db()
+        self.assertEqual(local.text, 'Местная запись')
+        self.assertFalse(local.comments.exists())
+
+    def test_comment_without_post_is_loaded(self):
+        '''Комментарий без записи загружается, а не пропадает.'''
+        Comment.objects.create(author=self.reader, text='Ничей')
+        expected = self.snapshot()
+        call_command('export_jsonl', self.path, stderr=StringIO())
+        self.clear()
+        call_command('import_jsonl', self.path, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_comment_to_missing_post_stops_import(self):
+        '''Комментарий к записи, которой нет, останавливает загрузку.'''
+        with open(self.path, 'w') as file:
+            file.write(json.dumps({
+                'model': 'comment', 'id': 100, 'post_id': 100,
+                'author': 'reader', 'text': 'Ок',
+                'created': '2020-01-01T00:00:00Z',
+            }) + '\n')
+        with self.assertRaises(CommandError):
+            call_command('import_jsonl', self.path, stdout=StringIO())
+        self.assertFalse(Comment.objects.filter(pk=100).exists())
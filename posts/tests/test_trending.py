@@ -0,0 +1,127 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import caching, trending
+from posts.models import Comment, Follow, Group, Post, TrendingScore
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.old = Post.objects.create(
+            text='Обсуждаемая запись', author=self.author, group=self.group
+        )
+        self.new = Post.objects.create(text='Новая запись', author=self.reader)
+
+    def top(self, group=None):
+        return list(trending.top(group))
+
+    def test_comments_raise_post(self):
+        '''Комментарии поднимают запись выше более новой.'''
+        self.assertEqual(self.top(), [self.new, self.old])
+        Comment.objects.create(post=self.old, author=self.reader, text='Ок')
+        self.assertEqual(self.top(), [self.old, self.new])
+
+    def test_follow_raises_recent_posts(self):
+        '''Подписка поднимает свежие записи автора.'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.top(), [self.old, self.new])
+
+    def test_score_decays(self):
+        '''Рейтинг затухает вдвое за TRENDING_HALF_LIFE.'''
+        score = TrendingScore.objects.get(post=self.old).score
+        now = timezone.now()
+        later = now + timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        self.assertAlmostEqual(
+            trending.current(score, later), trending.current(score, now) / 2
+        )
+
+    def test_incremental_matches_rebuild(self):
+        '''Рейтинги после событий совпадают с пересчитанными заново,
+        в том числе пачками по одной записи.'''
+        for i in range(3):
+            Comment.objects.create(
+                post=self.old, author=self.reader, text=f'Ок {i}'
+            )
+        scores = dict(TrendingScore.objects.values_list('post', 'score'))
+        self.assertEqual(trending.rebuild(batch_size=1), 2)
+        for pk, score in TrendingScore.objects.values_list('post', 'score'):
+            self.assertAlmostEqual(scores[pk], score)
+
+    def test_rebuild_skips_comments_without_post(self):
+        '''Комментарии без записи не мешают пересчёту.'''
+        Comment.objects.create(author=self.reader, text='Ничей')
+        self.assertEqual(trending.rebuild(), 2)
+
+    def test_group_trending(self):
+        '''Популярное группы показывает только записи группы.'''
+        self.assertEqual(self.top(self.group), [self.old])
+        self.new.group = self.group
+        self.new.save()
+        self.old.group = None
+        self.old.save()
+        self.assertEqual(self.top(self.group), [self.new])
+
+    def test_pages(self):
+        '''Страницы популярного показывают записи.'''
+        client = Client()
+        response = client.get(reverse('trending'))
+        self.assertEqual(list(response.context['page']), [self.new, self.old])
+        response = client.get(reverse('group_trending', args=('group',)))
+        self.assertEqual(response.context['group'], self.group)
+        self.assertContains(response, 'Обсуждаемая запись')
+        self.assertNotContains(response, 'Новая запись')
+        response = client.get(reverse('group_trending', args=('missing',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_resets_cached_pages(self):
+        '''Подписка меняет порядок и на закэшированных страницах.'''
+        client = Client()
+        other = Post.objects.create(
+            text='Ещё одна', author=self.reader, group=self.group
+        )
+        for url in (reverse('trending'),
+                    reverse('group_trending', args=('group',))):
+            client.get(url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = client.get(reverse('trending'))
+        self.assertEqual(response.context['page'][0], self.old)
+        response = client.get(reverse('group_trending', args=('group',)))
+        self.assertEqual(list(response.context['page']), [self.old, other])
+
+    def test_group_page_cached_once(self):
+        '''Страница популярного группы кэшируется один раз.'''
+        with mock.patch.object(
+            caching, '_page_key', wraps=caching._page_key
+        ) as page_key:
+            Client().get(reverse('group_trending', args=('group',)))
+        self.assertEqual(page_key.call_count, 1)
+
+    def test_top_reads_score_index(self):
+        '''Лучшие записи читаются по индексу рейтинга без сортировки.'''
+        if connection.vendor != 'sqlite':
+            self.skipTest('план запроса проверяется на SQLite')
+        for group, index in ((None, 'trending_score_idx'),
+                             (self.group, 'trending_group_score_idx')):
+            sql, params = trending.top(group).query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            with self.subTest(group=group):
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
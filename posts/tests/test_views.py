@@ -1,9 +1,10 @@
 from django import forms
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -35,6 +36,7 @@ class PostPagesTest(TestCase):
         cls.post = Post.objects.first()
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
         self.user = User.objects.create_user(username='StasBasov')
@@ -253,3 +255,114 @@ class PostPagesTest(TestCase):
             with self.subTest(value=value):
                 form_field = response.context['form'].fields[value]
                 self.assertIsInstance(form_field, expected)
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='title group',
+            slug='test-slug',
+            description='description group'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        commentator = User.objects.create_user(username='commentator')
+        for i in range(12):
+            post = Post.objects.create(
+                text=f'Текст {i}',
+                author=cls.author,
+                group=cls.group if i % 2 else None
+            )
+            Comment.objects.create(post=post, author=commentator, text='Ок')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_feed_pages_query_count(self):
+        '''Число запросов на страницу ленты не зависит от числа записей.'''
+        pages = (
+            (self.guest_client, reverse('index'), 2),
+            (self.guest_client, reverse('group', args=(self.group.slug,)), 3),
+            (self.guest_client, reverse('profile', args=(self.author,)), 3),
+            # лента подписок читает ещё и подсказки «на кого подписаться»
+            (self.authorized_client, reverse('follow_index'), 6),
+            # сессия, пользователь, автор с подпиской, число, записи
+            # и подсказки
+            (self.authorized_client, reverse('profile', args=(self.author,)),
+             6),
+        )
+        for client, url, queries in pages:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertContains(response, 'Комментариев: 1')
+
+    def test_profile_following(self):
+        '''Статус подписки на странице профиля.'''
+        url = reverse('profile', args=(self.author,))
+        response = self.authorized_client.get(url)
+        self.assertTrue(response.context['following'])
+        self.assertContains(response, 'Отписаться')
+        other_client = Client()
+        other_client.force_login(User.objects.get(username='commentator'))
+        self.assertFalse(other_client.get(url).context['following'])
+        self.assertFalse(self.guest_client.get(url).context['following'])
+
+
+@override_settings(COMMENTS_PER_PAGE=5)
+class PostCommentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Текст', author=cls.author)
+        for i in range(12):
+            commentator = User.objects.create_user(username=f'user{i}')
+            Comment.objects.create(
+                post=cls.post, author=commentator, text=f'Ответ {i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('post', args=(self.author, self.post.pk))
+
+    def test_comments_are_paginated(self):
+        '''Комментарии выводятся страницами, новые сначала.'''
+        response = self.guest_client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            [f'Ответ {i}' for i in range(11, 6, -1)]
+        )
+        self.assertContains(response, '?comments=2')
+        response = self.guest_client.get(self.url, {'comments': 3})
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Ответ 1', 'Ответ 0']
+        )
+        self.assertNotContains(response, '?comments=4')
+
+    def test_post_page_query_count(self):
+        '''Страница записи не делает запросов на каждый комментарий.'''
+        # запись с автором, группой и числом комментариев, комментарии
+        with self.assertNumQueries(2):
+            self.guest_client.get(self.url)
+
+    def test_wrong_username(self):
+        '''Чужое имя в адресе по-прежнему показывает автора из адреса.'''
+        other = User.objects.create_user(username='other')
+        response = self.guest_client.get(
+            reverse('post', args=(other, self.post.pk))
+        )
+        self.assertEqual(response.context['author'], other)
+        response = self.guest_client.get(
+            reverse('post', args=('nobody', self.post.pk))
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,134 @@
+"""Уменьшенные копии картинок записей для srcset.
+
+Для каждой ширины из WIDTHS создаётся копия с пропорциями карточки
+в каждом формате из FORMATS. Имена и размеры копий сохраняются
+в Post.image_variants вместе с именем картинки, из которой они сделаны,
+поэтому шаблону не нужно обращаться к хранилищу или кэшу миниатюр.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps, features
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# пропорции карточки записи
+ASPECT = (960, 339)
+WIDTHS = (320, 640, 960)
+# webp для браузеров, которые его понимают, если Pillow собран с ним,
+# jpeg для остальных
+FORMATS = (
+    ('jpeg', 'JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+)
+if features.check('webp'):
+    FORMATS = (('webp', 'WEBP', {'quality': 75, 'method': 4}),) + FORMATS
+
+_executor = None
+
+
+def _widths(source_width):
+    # копии крупнее исходной картинки не нужны, но одна есть всегда
+    return [width for width in WIDTHS if width <= source_width] or WIDTHS[:1]
+
+
+def _render(name):
+    """Копии картинки `name`: описание и содержимое каждой."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    with default_storage.open(name) as file, Image.open(file) as image:
+        image = image.convert('RGB')
+        for width in _widths(image.width):
+            height = round(width * ASPECT[1] / ASPECT[0])
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            for extension, image_format, options in FORMATS:
+                output = BytesIO()
+                resized.save(output, image_format, **options)
+                variant = {
+                    'format': extension,
+                    'width': width,
+                    'height': height,
+                    'name': f'posts/variants/{stem}-{width}.{extension}',
+                }
+                yield variant, output.getvalue()
+
+
+def _delete(variants):
+    for variant in variants:
+        default_storage.delete(variant['name'])
+
+
+def generate(pk, force=False):
+    """Создаёт копии картинки записи и сохраняет их описание в записи."""
+    post = Post.objects.filter(pk=pk).first()
+    if post is None or not post.image:
+        return
+    name = post.image.name
+    old = post.image_variants or {}
+    if old.get('image') == name and not force:
+        return
+    variants = []
+    for variant, content in _render(name):
+        variant['name'] = default_storage.save(
+            variant['name'], ContentFile(content)
+        )
+        variants.append(variant)
+    with transaction.atomic():
+        # картинку могли заменить, пока создавались копии
+        updated = Post.objects.select_for_update().filter(
+            pk=pk, image=name
+        ).first()
+        if updated is None:
+            _delete(variants)
+            return
+        updated.image_variants = {'image': name, 'variants': variants}
+        # сохранение сбрасывает кэш карточек записи
+        updated.save(update_fields=['image_variants'])
+    _delete(old.get('variants', ()))
+
+
+def _generate_inline(pk):
+    # запись уже сохранена, ошибка копий не должна превращаться в 500
+    try:
+        generate(pk)
+    except Exception:
+        logger.exception('Не удалось создать копии картинки записи %s', pk)
+
+
+def _generate_in_background(pk):
+    try:
+        generate(pk)
+    except Exception:
+        logger.exception('Не удалось создать копии картинки записи %s', pk)
+    finally:
+        # у потока пула свои соединения с базой
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def schedule(post):
+    """Создаёт копии картинки записи после коммита, не задерживая ответ."""
+    if not post.image:
+        return
+    pk = post.pk
+    if not settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: _generate_inline(pk))
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_generate_in_background, pk)
+    )
@@ -0,0 +1,184 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Max, Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+_executor = None
+
+
+def _bulk_insert(entries):
+    entries = iter(entries)
+    batch = list(islice(entries, BATCH_SIZE))
+    while batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        batch = list(islice(entries, BATCH_SIZE))
+
+
+def is_popular(author_id):
+    """Автор слишком популярен для раскладки записей по лентам."""
+    return UserStats.objects.filter(user_id=author_id, popular=True).exists()
+
+
+def popular_authors(user):
+    """Популярные авторы, на которых подписан пользователь."""
+    return Follow.objects.filter(
+        user=user, author__stats__popular=True,
+    ).values('author')
+
+
+def fan_out(post):
+    """Раскладывает новую запись по лентам подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту записи автора, на которого подписались."""
+    if is_popular(author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts.iterator()
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты записи автора, от которого отписались."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def mark_popular():
+    """Отмечает популярных авторов по счётчикам, например после
+    пересчёта UserStats."""
+    UserStats.objects.filter(
+        followers__gte=settings.TIMELINE_FANOUT_LIMIT
+    ).update(popular=True)
+
+
+def _spread(author_id):
+    """Возвращает автора к раскладке и раскладывает записи, вышедшие,
+    пока он был популярен."""
+    with transaction.atomic():
+        # подписчиков могли снова прибавить, пока задача ждала очереди
+        resumed = UserStats.objects.filter(
+            user_id=author_id, popular=True,
+            followers__lt=settings.TIMELINE_FANOUT_RESUME,
+        ).update(popular=False)
+        if not resumed:
+            return
+        # записи до последней разложенной уже в лентах
+        since = TimelineEntry.objects.filter(
+            post__author_id=author_id
+        ).aggregate(since=Max('pub_date'))['since']
+    # новые записи после коммита раскладываются сами, а уже
+    # разложенные не дублируются
+    posts = Post.objects.filter(author_id=author_id)
+    if since is not None:
+        posts = posts.filter(pub_date__gt=since)
+    posts = list(posts.values_list('pk', 'pub_date'))
+    if not posts:
+        return
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for user_id in followers.iterator()
+        for pk, pub_date in posts
+    )
+
+
+def _spread_logged(author_id):
+    # подписка уже сохранена, ошибка раскладки не должна её отменять
+    try:
+        _spread(author_id)
+    except Exception:
+        logger.exception('Не удалось разложить записи автора %s', author_id)
+
+
+def _spread_in_background(author_id):
+    try:
+        _spread_logged(author_id)
+    finally:
+        # у потока пула свои соединения с базой
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.TIMELINE_WORKERS,
+            thread_name_prefix='timeline',
+        )
+    return _executor
+
+
+def followers_changed(author_id):
+    """Переводит автора между раскладкой и чтением по числу подписчиков.
+
+    Популярным автор становится на TIMELINE_FANOUT_LIMIT подписчиках,
+    а к раскладке возвращается меньше чем на TIMELINE_FANOUT_RESUME.
+    Пока он популярен, его записи не раскладываются и подмешиваются
+    при чтении. Вернувшись, он раскладывает только эти записи и не
+    в запросе, а после коммита в пуле потоков.
+    """
+    UserStats.objects.filter(
+        user_id=author_id, popular=False,
+        followers__gte=settings.TIMELINE_FANOUT_LIMIT,
+    ).update(popular=True)
+    resuming = UserStats.objects.filter(
+        user_id=author_id, popular=True,
+        followers__lt=settings.TIMELINE_FANOUT_RESUME,
+    ).exists()
+    if not resuming:
+        return
+    if not settings.TIMELINE_WORKERS:
+        transaction.on_commit(lambda: _spread_logged(author_id))
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_spread_in_background, author_id)
+    )
+
+
+def feed(user):
+    """Записи авторов, на которых подписан пользователь.
+
+    Обычно это один проход по индексу ленты. Записи популярных авторов
+    в ленты не раскладываются и подмешиваются при чтении. Сортировать
+    ленту следует по `feed_date` и `feed_pk`: в обычном случае это
+    порядок индекса ленты.
+    """
+    popular = popular_authors(user)
+    if not popular.exists():
+        return Post.objects.filter(timeline__user=user).annotate(
+            feed_date=F('timeline__pub_date'),
+            feed_pk=F('timeline__post'),
+        ).order_by('-feed_date', '-feed_pk')
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(author__in=popular)
+    ).annotate(
+        feed_date=F('pub_date'), feed_pk=F('pk')
+    ).order_by('-feed_date', '-feed_pk')
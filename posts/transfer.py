@@ -0,0 +1,303 @@
+"""Перенос данных в формате JSON Lines.
+
+Каждая строка - одна запись с ключом `model`. Пользователи и группы
+ссылаются друг на друга по естественным ключам (username и slug),
+записи и комментарии сохраняют свои id. Если id уже занят в базе
+другой записью или комментарием, загрузка останавливается: иначе
+запись из файла потерялась бы, а её комментарии достались бы чужой
+записи. Так же загрузка останавливается на комментарии к записи,
+которой нет ни в файле, ни в базе.
+
+Выгрузка и загрузка идут потоком. После загрузки пересчитываются
+счётчики, рейтинги и подсказки: рейтинги считаются пачками записей,
+а подсказкам нужен весь граф подписок, он держится в памяти
+компактными массивами, по два числа на подписку.
+"""
+import json
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import search, stats, suggestions, timeline, trending
+from .models import Comment, Follow, Group, Post, User
+
+MODELS = ('user', 'group', 'post', 'comment', 'follow')
+
+EXPORTS = {
+    'user': (User, ('username', 'first_name', 'last_name', 'email',
+                    'date_joined')),
+    'group': (Group, ('slug', 'title', 'description')),
+    'post': (Post, ('id', 'text', 'pub_date', 'image', 'author__username',
+                    'group__slug')),
+    'comment': (Comment, ('id', 'post_id', 'author__username', 'text',
+                          'created')),
+    'follow': (Follow, ('user__username', 'author__username')),
+}
+
+
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder округляет время до миллисекунд
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _rename(row):
+    # author__username -> author, group__slug -> group
+    return {name.split('__')[0]: value for name, value in row.items()}
+
+
+def export(stream, models=MODELS, chunk_size=2000):
+    """Пишет записи моделей в поток, возвращает число строк."""
+    total = 0
+    for name in models:
+        model, fields = EXPORTS[name]
+        rows = model.objects.order_by('pk').values(*fields)
+        for row in rows.iterator(chunk_size=chunk_size):
+            stream.write(json.dumps(
+                {'model': name, **_rename(row)},
+                cls=_Encoder,
+                ensure_ascii=False,
+            ))
+            stream.write('\n')
+            total += 1
+    return total
+
+
+def _user_ids(usernames):
+    """id пользователей по username, недостающие создаются без пароля."""
+    usernames = set(usernames)
+    ids = dict(User.objects.filter(
+        username__in=usernames
+    ).values_list('username', 'pk'))
+    missing = usernames - ids.keys()
+    if missing:
+        User.objects.bulk_create(
+            (User(username=username, password=make_password(None))
+             for username in missing),
+            ignore_conflicts=True,
+        )
+        ids.update(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'pk'))
+    return ids
+
+
+def _group_ids(slugs):
+    slugs = set(slugs) - {None}
+    ids = dict(Group.objects.filter(
+        slug__in=slugs
+    ).values_list('slug', 'pk'))
+    missing = slugs - ids.keys()
+    if missing:
+        Group.objects.bulk_create(
+            (Group(slug=slug, title=slug, description='')
+             for slug in missing),
+            ignore_conflicts=True,
+        )
+        ids.update(Group.objects.filter(
+            slug__in=missing
+        ).values_list('slug', 'pk'))
+    return ids
+
+
+def _check_ids(model, objects, fields):
+    """Проверяет, что id объектов из файла не заняты в базе другими.
+
+    Объект с тем же id и теми же полями - уже загруженная строка,
+    например при повторной загрузке.
+    """
+    loaded = {obj.pk: obj for obj in objects}
+    for row in model.objects.filter(pk__in=loaded).values('pk', *fields):
+        obj = loaded[row['pk']]
+        if any(getattr(obj, field) != row[field] for field in fields):
+            raise ValueError(
+                f'{model.__name__} с id {obj.pk} уже есть в базе '
+                'с другими данными'
+            )
+
+
+def _load_users(rows):
+    User.objects.bulk_create(
+        (
+            User(
+                username=row['username'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                email=row['email'],
+                date_joined=parse_datetime(row['date_joined']),
+                password=make_password(None),
+            )
+            for row in rows
+        ),
+        ignore_conflicts=True,
+    )
+    return len(rows)
+
+
+def _load_groups(rows):
+    Group.objects.bulk_create(
+        (
+            Group(
+                slug=row['slug'],
+                title=row['title'],
+                description=row['description'],
+            )
+            for row in rows
+        ),
+        ignore_conflicts=True,
+    )
+    return len(rows)
+
+
+def _load_posts(rows):
+    users = _user_ids(row['author'] for row in rows)
+    groups = _group_ids(row['group'] for row in rows)
+    posts = [
+        Post(
+            id=row['id'],
+            text=row['text'],
+            pub_date=parse_datetime(row['pub_date']),
+            image=row['image'] or '',
+            author_id=users[row['author']],
+            group_id=groups.get(row['group']),
+        )
+        for row in rows
+    ]
+    _check_ids(Post, posts, ('author_id', 'pub_date', 'text'))
+    Post.objects.bulk_create(posts, ignore_conflicts=True)
+    # bulk_create не шлёт сигналов: ленты и резервный индекс поиска
+    # обновляются здесь, счётчики и рейтинги пересчитываются в конце
+    # загрузки
+    for post in Post.objects.filter(pk__in=[post.pk for post in posts]):
+        timeline.fan_out(post)
+    if not search.fts_enabled():
+        search.index_posts(Post.objects.filter(
+            pk__in=[post.pk for post in posts]
+        ))
+    return len(posts)
+
+
+def _load_comments(rows):
+    users = _user_ids(row['author'] for row in rows)
+    post_ids = {row['post_id'] for row in rows} - {None}
+    # комментарии без записи загружаются как есть, а ссылка на запись,
+    # которой нет ни в файле, ни в базе, значит, что файл неполный
+    missing = post_ids - set(Post.objects.filter(
+        pk__in=post_ids
+    ).values_list('pk', flat=True))
+    if missing:
+        raise ValueError(
+            f'Комментарии ссылаются на записи, которых нет в базе: '
+            f'{", ".join(map(str, sorted(missing)))}'
+        )
+    comments = [
+        Comment(
+            id=row['id'],
+            post_id=row['post_id'],
+            author_id=users[row['author']],
+            text=row['text'],
+            created=parse_datetime(row['created']),
+        )
+        for row in rows
+    ]
+    _check_ids(Comment, comments, ('post_id', 'author_id', 'created', 'text'))
+    Comment.objects.bulk_create(comments, ignore_conflicts=True)
+    return len(comments)
+
+
+def _load_follows(rows):
+    users = _user_ids(
+        username for row in rows for username in (row['user'], row['author'])
+    )
+    follows = [
+        Follow(user_id=users[row['user']], author_id=users[row['author']])
+        for row in rows
+        if row['user'] != row['author']
+    ]
+    Follow.objects.bulk_create(follows, ignore_conflicts=True)
+    for follow in follows:
+        timeline.backfill(follow.user_id, follow.author_id)
+    return len(follows)
+
+
+LOADERS = {
+    'user': _load_users,
+    'group': _load_groups,
+    'post': _load_posts,
+    'comment': _load_comments,
+    'follow': _load_follows,
+}
+
+
+@contextmanager
+def _keep_dates():
+    """Сохраняет даты из файла вместо текущего времени."""
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _batches(lines, batch_size):
+    """Пачки подряд идущих строк одной модели с номером последней строки."""
+    model, batch, number = None, [], 0
+    for number, line in lines:
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        name = row.pop('model')
+        if name not in LOADERS:
+            raise ValueError(f'Строка {number}: неизвестная модель {name}')
+        if batch and (name != model or len(batch) >= batch_size):
+            yield model, batch, number - 1
+            batch = []
+        model = name
+        batch.append(row)
+    if batch:
+        yield model, batch, number
+
+
+def load(stream, batch_size=1000, start=0, on_batch=None):
+    """Загружает записи из потока, пропуская первые `start` строк.
+
+    После каждой сохранённой пачки вызывается `on_batch` с номером
+    последней обработанной строки - по нему загрузку можно продолжить.
+    Повторная загрузка тех же строк ничего не дублирует.
+    """
+    lines = (
+        (number, line)
+        for number, line in enumerate(stream, 1)
+        if number > start
+    )
+    total = 0
+    with _keep_dates():
+        for model, rows, number in _batches(lines, batch_size):
+            with transaction.atomic():
+                total += LOADERS[model](rows)
+            if on_batch is not None:
+                on_batch(number)
+    # id пришли из файла, счётчики id в базе нужно сдвинуть за них
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        ):
+            cursor.execute(sql)
+    stats.rebuild()
+    timeline.mark_popular()
+    trending.rebuild()
+    suggestions.rebuild()
+    return total
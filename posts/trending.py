@@ -0,0 +1,128 @@
+"""Популярные записи.
+
+Рейтинг записи - сумма весов событий: публикации, комментариев
+и подписок на автора. Вклад каждого события затухает вдвое
+за TRENDING_HALF_LIFE. Затухание у всех записей общее, поэтому
+хранится не текущий рейтинг, а логарифм суммы весов, приведённых
+к моменту EPOCH: ln Σ w·exp((t - EPOCH) / τ). Порядок по нему совпадает
+с порядком по текущему рейтингу, а новое событие меняет одну строку
+одним UPDATE, без пересчёта остальных записей.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+from .models import Comment, Post, TrendingScore
+
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+FOLLOW_WEIGHT = 2.0
+BATCH_SIZE = 500
+
+
+def _points(weight, when):
+    """Логарифм веса события, приведённого к EPOCH."""
+    tau = settings.TRENDING_HALF_LIFE / math.log(2)
+    return math.log(weight) + (when - EPOCH).total_seconds() / tau
+
+
+def _log_add(a, b):
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+
+def _add(points):
+    """Выражение для UPDATE: ln(exp(score) + exp(points))."""
+    points = Value(points, output_field=FloatField())
+    return Greatest(F('score'), points) + Ln(
+        1 + Exp(-Abs(F('score') - points))
+    )
+
+
+def current(score, now):
+    """Рейтинг на момент `now` по сохранённому значению."""
+    tau = settings.TRENDING_HALF_LIFE / math.log(2)
+    return math.exp(score - (now - EPOCH).total_seconds() / tau)
+
+
+def track(post):
+    """Заводит рейтинг новой записи."""
+    TrendingScore.objects.update_or_create(post=post, defaults={
+        'group_id': post.group_id,
+        'score': _points(POST_WEIGHT, post.pub_date),
+    })
+
+
+def move(post):
+    """Переносит рейтинг записи в её текущую группу."""
+    TrendingScore.objects.filter(post=post).exclude(
+        group_id=post.group_id
+    ).update(group_id=post.group_id)
+
+
+def add_comment(comment):
+    TrendingScore.objects.filter(post_id=comment.post_id).update(
+        score=_add(_points(COMMENT_WEIGHT, comment.created))
+    )
+
+
+def add_follow(author_id, when):
+    """Поднимает свежие записи автора, на которого подписались.
+
+    Возвращает slug групп поднятых записей, None - записи без группы.
+    """
+    window = timedelta(seconds=settings.TRENDING_FOLLOW_WINDOW)
+    scores = TrendingScore.objects.filter(
+        post__author_id=author_id, post__pub_date__gte=when - window
+    )
+    slugs = set(scores.values_list('group__slug', flat=True))
+    if slugs:
+        scores.update(score=_add(_points(FOLLOW_WEIGHT, when)))
+    return slugs
+
+
+def top(group=None):
+    """Лучшие записи по рейтингу, читаются по индексу рейтинга."""
+    posts = Post.objects.for_feed()
+    if group is None:
+        posts = posts.filter(trending__isnull=False)
+    else:
+        posts = posts.filter(trending__group=group)
+    return posts.order_by('-trending__score')[:settings.TRENDING_SIZE]
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Пересчитывает рейтинги по записям и комментариям.
+
+    Записи читаются пачками по id, в памяти держится одна пачка.
+    Время подписок не хранится, поэтому после пересчёта подписки
+    в рейтинге не учитываются.
+    """
+    TrendingScore.objects.all().delete()
+    posts = Post.objects.order_by('pk').values_list(
+        'pk', 'group_id', 'pub_date'
+    )
+    total = 0
+    batch = list(posts[:batch_size])
+    while batch:
+        scores = {
+            pk: _points(POST_WEIGHT, pub_date) for pk, _, pub_date in batch
+        }
+        # комментарии без записи в рейтинг не входят
+        for post_id, created in Comment.objects.filter(
+            post_id__in=scores
+        ).values_list('post_id', 'created').iterator():
+            scores[post_id] = _log_add(
+                scores[post_id], _points(COMMENT_WEIGHT, created)
+            )
+        TrendingScore.objects.bulk_create(
+            TrendingScore(post_id=pk, group_id=group_id, score=scores[pk])
+            for pk, group_id, _ in batch
+        )
+        total += len(batch)
+        batch = list(posts.filter(pk__gt=batch[-1][0])[:batch_size])
+    return total
@@ -5,9 +5,27 @@ from . import views
 urlpatterns = [
     path('', views.Index.as_view(), name='index'),
     path('follow/', views.FollowIndex.as_view(), name='follow_index'),
+    path('trending/', views.Trending.as_view(), name='trending'),
+    path('feed/<str:kind>/', views.site_feed, name='site_feed'),
     path('group/<slug:slug>/', views.GroupPosts.as_view(), name='group'),
+    path(
+        'group/<slug:slug>/trending/',
+        views.GroupTrending.as_view(),
+        name='group_trending'
+    ),
+    path(
+        'group/<slug:slug>/feed/<str:kind>/',
+        views.group_feed,
+        name='group_feed'
+    ),
     path('new/', views.NewPost.as_view(), name='new_post'),
+    path('search/', views.Search.as_view(), name='search'),
     path('<str:username>/', views.Profile.as_view(), name='profile'),
+    path(
+        '<str:username>/feed/<str:kind>/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
     path('<str:username>/<int:pk>/', views.post_view, name='post'),
     path(
         '<str:username>/<int:pk>/edit/',
@@ -1,21 +1,44 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.urls.base import reverse
 from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
 from django.views.generic import CreateView, ListView, UpdateView
 
-from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
-
+from yatube.routers import pins_primary, read_from_replica
 
-class Index(ListView):
+from . import (
+    caching, feeds, images, search, suggestions, thumbnails, timeline,
+    trending,
+)
+from .forms import CommentForm, PostForm
+from .models import Follow, Group, Post, User
+from .pagination import CursorPaginationMixin
+
+
+@read_from_replica
+@method_decorator(
+    caching.conditional_page(caching.feed_tags), name='dispatch'
+)
+@method_decorator(
+    caching.cache_anonymous_page(caching.feed_tags), name='dispatch'
+)
+class Index(CursorPaginationMixin, ListView):
     template_name = 'posts/index.html'
     paginate_by = 10
     model = Post
 
+    def get_queryset(self):
+        return Post.objects.for_feed()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        caching.set_card_versions(context['object_list'])
         context['page'] = context.pop('page_obj')
         # для прохождения тестов практикума
         context['hide_paginator'] = context.pop('paginator', None)
@@ -25,18 +48,22 @@ class Index(ListView):
 @method_decorator(login_required, name='dispatch')
 class FollowIndex(Index):
     template_name = 'posts/follow.html'
+    cursor_ordering = ('-feed_date', '-feed_pk')
 
     def get_queryset(self):
-        return Post.objects.filter(author__following__user=self.request.user)
+        return timeline.feed(self.request.user).for_feed()
 
     def get_context_data(self, **kwargs):
         # для прохождения тестов практикума весь метод переопределил
         context = super().get_context_data(**kwargs)
         context['paginator'] = context.pop('hide_paginator')
+        context['suggestions'] = suggestions.for_user(self.request.user)
         return context
 
 
+@pins_primary
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
@@ -45,7 +72,9 @@ def profile_follow(request, username):
     return redirect('profile', username=username)
 
 
+@pins_primary
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
@@ -53,51 +82,139 @@ def profile_unfollow(request, username):
     return redirect('profile', username=username)
 
 
-class GroupPosts(ListView):
+@read_from_replica
+@method_decorator(
+    caching.conditional_page(caching.group_tags), name='dispatch'
+)
+@method_decorator(
+    caching.cache_anonymous_page(caching.group_tags), name='dispatch'
+)
+class GroupPosts(CursorPaginationMixin, ListView):
     template_name = 'group.html'
     paginate_by = 10
     context_object_name = 'posts'
 
     def get_queryset(self):
         self.group = get_object_or_404(Group, slug=self.kwargs['slug'])
-        return self.group.posts.all()
+        return Post.objects.for_feed().filter(group=self.group)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        caching.set_card_versions(context['object_list'])
         context['group'] = self.group
         context['page'] = context.pop('page_obj')
         context.pop('paginator', None)  # для прохождения тестов практикума
         return context
 
 
-class Profile(ListView):
+@read_from_replica
+@method_decorator(
+    caching.conditional_page(caching.profile_tags), name='dispatch'
+)
+@method_decorator(
+    caching.cache_anonymous_page(caching.profile_tags), name='dispatch'
+)
+class Profile(CursorPaginationMixin, ListView):
     template_name = 'posts/profile.html'
     paginate_by = 10
 
     def get_queryset(self):
-        self.author = get_object_or_404(User, username=self.kwargs['username'])
-        return self.author.posts.all()
+        authors = User.objects.select_related('stats')
+        user = self.request.user
+        if user.is_authenticated:
+            # статус подписки приходит тем же запросом, что и автор
+            authors = authors.annotate(is_followed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            ))
+        self.author = get_object_or_404(
+            authors, username=self.kwargs['username']
+        )
+        return Post.objects.for_feed().filter(author=self.author)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        caching.set_card_versions(context['object_list'])
         context['page'] = context.pop('page_obj')
         context['author'] = self.author
         context.pop('paginator', None)  # для прохождения тестов практикума
-        user = self.request.user
-        if user.is_authenticated:
-            author = self.author
-            context['following'] = Follow.objects.filter(
-                user=user, author=author
-            ).exists()
+        context['following'] = getattr(self.author, 'is_followed', False)
+        context['suggestions'] = suggestions.for_user(self.request.user)
         return context
 
 
-@method_decorator(login_required, name='dispatch')
-class PostEdit(UpdateView):
+class BaseTrending(ListView):
+    """Популярное без кэша: кэшируют подклассы, каждый по своим тегам."""
+    template_name = 'posts/trending.html'
+    paginate_by = 10
+
+    def get_queryset(self):
+        return trending.top()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        caching.set_card_versions(context['object_list'])
+        context['page'] = context.pop('page_obj')
+        context.pop('paginator', None)
+        return context
+
+
+@read_from_replica
+@method_decorator(
+    caching.cache_anonymous_page(caching.feed_tags), name='dispatch'
+)
+class Trending(BaseTrending):
+    pass
+
+
+@read_from_replica
+@method_decorator(
+    caching.cache_anonymous_page(caching.group_tags), name='dispatch'
+)
+class GroupTrending(BaseTrending):
+    def get_queryset(self):
+        self.group = get_object_or_404(Group, slug=self.kwargs['slug'])
+        return trending.top(self.group)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['group'] = self.group
+        return context
+
+
+class Search(CursorPaginationMixin, ListView):
+    template_name = 'posts/search.html'
+    paginate_by = 10
+    # чем меньше search_rank, тем выше запись в выдаче
+    cursor_ordering = ('search_rank', 'pk')
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return search.search(self.query).for_feed()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        caching.set_card_versions(context['object_list'])
+        context['page'] = context.pop('page_obj')
+        context.pop('paginator', None)
+        context['q'] = self.query
+        context['paginator_query'] = urlencode({'q': self.query}) + '&'
+        return context
+
+
+class PostFormMixin:
     form_class = PostForm
     model = Post
     template_name = 'posts/newpost.html'
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['oversized'] = images.oversized(self.request)
+        return kwargs
+
+
+@method_decorator(login_required, name='dispatch')
+class PostEdit(PostFormMixin, UpdateView):
+
     def get_success_url(self):
         return reverse('post', args=self.args, kwargs=self.kwargs)
 
@@ -107,24 +224,38 @@ class PostEdit(UpdateView):
             return redirect('post', *args, **kwargs)
         return super().dispatch(request, *args, **kwargs)
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            thumbnails.schedule(self.object)
+        return response
+
 
 @method_decorator(login_required, name='dispatch')
-class NewPost(CreateView):
-    model = Post
-    fields = ['group', 'text', 'image']
-    template_name = 'posts/newpost.html'
+class NewPost(PostFormMixin, CreateView):
     success_url = reverse_lazy('index')
 
     def form_valid(self, form):
         post = form.save(commit=False)
         post.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            thumbnails.schedule(self.object)
+        return response
 
 
+@read_from_replica
+@caching.conditional_page(caching.post_tags)
+@caching.cache_anonymous_page(caching.post_tags)
 def post_view(request, username, pk):
-    author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, id=pk)
-    comments = Comment.objects.filter(post=post).all()
+    post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__stats'), id=pk
+    )
+    author = post.author
+    if author.username != username:
+        author = get_object_or_404(
+            User.objects.select_related('stats'), username=username
+        )
     if request.method == 'POST' and request.user.is_authenticated:
         form = CommentForm(request.POST)
         if form.is_valid():
@@ -134,11 +265,19 @@ def post_view(request, username, pk):
             new_comment.save()
             return redirect('post', username, pk)
     form = CommentForm()
+    paginator = Paginator(
+        post.comments.select_related('author').order_by('-created', '-pk'),
+        settings.COMMENTS_PER_PAGE,
+    )
+    # комментарии уже посчитаны в запросе записи
+    paginator.count = post.comments_count
+    comments_page = paginator.get_page(request.GET.get('comments'))
     content = {
         'post': post,
         'author': author,
         'form': form,
-        'comments': comments,
+        'comments': comments_page.object_list,
+        'comments_page': comments_page,
     }
     return render(request, 'posts/post.html', content)
 
@@ -146,6 +285,41 @@ def post_view(request, username, pk):
 add_comment = login_required(post_view)
 
 
+@read_from_replica
+@caching.conditional_page(caching.feed_tags)
+@caching.cache_anonymous_page(caching.feed_tags)
+def site_feed(request, kind):
+    return feeds.response(
+        request, kind, Post.objects.all(),
+        title='Yatube: последние записи', link=reverse('index'),
+    )
+
+
+@read_from_replica
+@caching.conditional_page(caching.group_tags)
+@caching.cache_anonymous_page(caching.group_tags)
+def group_feed(request, slug, kind):
+    group = get_object_or_404(Group, slug=slug)
+    return feeds.response(
+        request, kind, group.posts.all(),
+        title=f'Yatube: {group.title}',
+        link=reverse('group', args=(slug,)),
+        description=group.description,
+    )
+
+
+@read_from_replica
+@caching.conditional_page(caching.profile_tags)
+@caching.cache_anonymous_page(caching.profile_tags)
+def profile_feed(request, username, kind):
+    author = get_object_or_404(User, username=username)
+    return feeds.response(
+        request, kind, author.posts.all(),
+        title=f'Yatube: записи {author.username}',
+        link=reverse('profile', args=(username,)),
+    )
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -0,0 +1,28 @@
+"""SQLite с настройкой каждого нового соединения.
+
+PRAGMA из ключа `PRAGMAS` настроек базы выполняются сразу после
+подключения, до первого запроса. Ключ `TRANSACTION_MODE` задаёт вид
+транзакций atomic(): с IMMEDIATE блокировка записи берётся в начале
+транзакции и ожидает busy_timeout. Отложенная транзакция, прочитавшая
+данные до чужой записи, получает «database is locked» сразу, без
+ожидания.
+
+Пересоздание таблицы в миграциях сохраняет её триггеры, см. schema.py.
+"""
+from django.db.backends.sqlite3 import base
+
+from .schema import DatabaseSchemaEditor
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    SchemaEditorClass = DatabaseSchemaEditor
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,24 @@
+from django.db.backends.sqlite3 import schema
+
+
+class DatabaseSchemaEditor(schema.DatabaseSchemaEditor):
+    def _remake_table(self, model, *args, **kwargs):
+        """Пересоздаёт таблицу вместе с триггерами, которые её касаются.
+
+        Django переносит таблицу в новую через переименование: триггеры
+        самой таблицы при этом пропадают, а триггеры других таблиц,
+        которые к ней обращаются, не дают переименовать таблицу.
+        """
+        table = model._meta.db_table
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                'AND (tbl_name = %s OR sql LIKE %s)',
+                (table, f'%{table}%'),
+            )
+            triggers = cursor.fetchall()
+        for name, _ in triggers:
+            self.execute(f'DROP TRIGGER {self.quote_name(name)}', None)
+        super()._remake_table(model, *args, **kwargs)
+        for _, sql in triggers:
+            self.execute(sql, None)
@@ -0,0 +1,222 @@
+"""Метрики запросов: представление, запросы к базе, время базы,
+отрисовки шаблонов и попадания в кэш.
+
+Метрики пишутся в журнал `yatube.metrics` одной строкой JSON
+на запрос и накапливаются в гистограммах длительности по представлениям.
+Доля измеряемых запросов задаётся настройкой `METRICS_SAMPLE_RATE`.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('yatube.metrics')
+
+# границы корзин гистограммы, мс
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+
+_current = ContextVar('metrics', default=None)
+_installed = False
+_MISSING = object()
+
+
+class RequestMetrics:
+    __slots__ = (
+        'queries', 'db_time', 'template_time', 'template_depth',
+        'cache_hits', 'cache_misses', 'cache_depth',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+class Histogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+        self.queries = 0
+
+    def observe(self, duration, queries):
+        with self.lock:
+            self.counts[bisect_left(BUCKETS, duration)] += 1
+            self.total += 1
+            self.sum += duration
+            self.queries += queries
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'count': self.total,
+                'sum_ms': round(self.sum, 2),
+                'queries': self.queries,
+                'buckets': dict(zip(map(str, BUCKETS), self.counts)),
+            }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(view):
+    with _histograms_lock:
+        return _histograms.setdefault(view, Histogram())
+
+
+def snapshot():
+    """Гистограммы длительности запросов по представлениям."""
+    with _histograms_lock:
+        views = list(_histograms.items())
+    return {view: hist.snapshot() for view, hist in views}
+
+
+def reset():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def _patch_template_render():
+    original = Template.render
+
+    @wraps(original)
+    def render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context)
+        # include и extends отрисовывают шаблоны внутри шаблона,
+        # время считается только у внешнего
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+    Template.render = render
+
+
+@contextmanager
+def _outer_cache_call():
+    """Метрики запроса для внешнего вызова кэша, иначе None.
+
+    get_many из BaseCache читает ключи через get, и попадания считаются
+    только во внешнем вызове, чтобы не учитывать их дважды.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield None
+        return
+    metrics.cache_depth += 1
+    try:
+        yield metrics if metrics.cache_depth == 1 else None
+    finally:
+        metrics.cache_depth -= 1
+
+
+def _patch_cache(cls):
+    if getattr(cls, '_metrics_patched', False):
+        return
+    original_get = cls.get
+    original_get_many = cls.get_many
+
+    @wraps(original_get)
+    def get(self, key, default=None, version=None):
+        with _outer_cache_call() as metrics:
+            value = original_get(self, key, _MISSING, version)
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    @wraps(original_get_many)
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with _outer_cache_call() as metrics:
+            found = original_get_many(self, keys, version)
+        if metrics is not None:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    cls.get = get
+    cls.get_many = get_many
+    cls._metrics_patched = True
+
+
+def install():
+    """Подключает подсчёт шаблонов и кэша, повторный вызов ничего не делает."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    _patch_template_render()
+    for alias in settings.CACHES:
+        _patch_cache(type(caches[alias]))
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        view = match.view_name if match else None
+        histogram(view).observe(duration, metrics.queries)
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'duration_ms': round(duration, 2),
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+        }))
+        return response
@@ -0,0 +1,84 @@
+"""Операции миграций, которые можно применять на работающем сайте.
+
+На PostgreSQL индексы строятся и удаляются с CONCURRENTLY: пока
+строится индекс, таблица остаётся доступной для записи. Такие запросы
+не выполняются внутри транзакции, поэтому миграция с этими операциями
+объявляет `atomic = False`. На остальных базах это обычные AddIndex
+и RemoveIndex: SQLite пишет в базу по одному соединению за раз,
+и индекс строится за одну короткую транзакцию.
+"""
+from django.db import NotSupportedError, migrations
+
+
+class ConcurrentlyMixin:
+    def _concurrently(self, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return False
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                f'{type(self).__name__} выполняется вне транзакции, '
+                'у миграции должно быть atomic = False'
+            )
+        return True
+
+    def _add(self, schema_editor, model, index):
+        if not self._concurrently(schema_editor):
+            schema_editor.add_index(model, index)
+            return
+        sql = str(index.create_sql(model, schema_editor))
+        schema_editor.execute(
+            sql.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)
+        )
+
+    def _remove(self, schema_editor, model, index):
+        if not self._concurrently(schema_editor):
+            schema_editor.remove_index(model, index)
+            return
+        sql = str(index.remove_sql(model, schema_editor))
+        schema_editor.execute(
+            sql.replace('DROP INDEX', 'DROP INDEX CONCURRENTLY', 1)
+        )
+
+
+class AddIndexConcurrently(ConcurrentlyMixin, migrations.AddIndex):
+    """AddIndex, не блокирующий запись в таблицу на PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            self._add(schema_editor, model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            self._remove(schema_editor, model, self.index)
+
+    def describe(self):
+        return 'Concurrently create index {} on field(s) {} of {}'.format(
+            self.index.name, ', '.join(self.index.fields), self.model_name
+        )
+
+
+class RemoveIndexConcurrently(ConcurrentlyMixin, migrations.RemoveIndex):
+    """RemoveIndex, не блокирующий запись в таблицу на PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            model_state = from_state.models[app_label, self.model_name_lower]
+            index = model_state.get_index_by_name(self.name)
+            self._remove(schema_editor, model, index)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            model_state = to_state.models[app_label, self.model_name_lower]
+            index = model_state.get_index_by_name(self.name)
+            self._add(schema_editor, model, index)
+
+    def describe(self):
+        return f'Concurrently remove index {self.name} from {self.model_name}'
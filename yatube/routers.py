@@ -0,0 +1,98 @@
+"""Маршрутизация запросов между основной базой и репликами.
+
+С реплик читают только представления, отмеченные `read_from_replica`,
+и только в запросах GET и HEAD. Пользователь, который что-то изменил,
+получает cookie `db_pin` и на DATABASE_PIN_SECONDS читает из основной
+базы, чтобы сразу увидеть своё изменение, даже если реплика отстаёт.
+Сессия и пользователь всегда читаются из основной базы.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def read_from_replica(view):
+    """Отмечает функцию или класс представления, читающие с реплик."""
+    view.read_from_replica = True
+    return view
+
+
+def reads_replica():
+    """Читает ли текущий запрос с реплик."""
+    return bool(settings.DATABASE_REPLICAS) and _use_replica.get()
+
+
+def pins_primary(view):
+    """Отмечает представление, которое пишет в базу и в запросе GET."""
+    view.pins_primary = True
+    return view
+
+
+def _marked(view, mark):
+    view_class = getattr(view, 'view_class', None)
+    return getattr(view, mark, False) or getattr(view_class, mark, False)
+
+
+class ReplicaRouter:
+    """Чтение с реплик из DATABASE_REPLICAS, запись в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _use_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики содержат те же данные, что и основная база
+        aliases = {'default', *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # реплики получают схему вместе с данными от основной базы
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.pins_primary = request.method not in SAFE_METHODS
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.set(False)
+        if request.pins_primary and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DATABASE_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if _marked(view_func, 'pins_primary'):
+            request.pins_primary = True
+        if (
+            not settings.DATABASE_REPLICAS
+            or request.pins_primary
+            or PIN_COOKIE in request.COOKIES
+            or not _marked(view_func, 'read_from_replica')
+        ):
+            return None
+        # сессия и пользователь загружаются лениво, читаем их до
+        # переключения на реплику: туда они могли ещё не доехать
+        request.user.is_authenticated
+        _use_replica.set(True)
+        return None
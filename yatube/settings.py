@@ -17,6 +17,7 @@ INSTALLED_APPS = [
     'users',
     'posts',
     'about',
+    'api',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -28,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -36,6 +38,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'yatube.routers.ReplicaMiddleware',
 ]
 
 INTERNAL_IPS = [
@@ -66,13 +69,44 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+# WAL позволяет читать во время записи, synchronous=NORMAL в режиме WAL
+# не теряет целостность при сбое, busy_timeout ждёт блокировку записи
+# вместо немедленной ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 20000,
+    'temp_store': 'memory',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Реплики основной базы только для чтения, например
+# YATUBE_REPLICA_DB=/var/lib/yatube/replica.sqlite3.
+DATABASE_REPLICAS = []
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+# Сколько секунд после изменения данных пользователь читает из основной
+# базы, а не с реплик; должно превышать отставание реплик.
+DATABASE_PIN_SECONDS = 15
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -102,6 +136,8 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# имена с хэшем содержимого и сжатые копии, см. yatube/static.py
+STATICFILES_STORAGE = 'yatube.static.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -113,8 +149,104 @@ LOGOUT_REDIRECT_URL = 'index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Версии тегов и страницы в кэше общие для всех процессов сервера:
+# сброс версии в одном процессе должен быть виден остальным. На одной
+# машине хватает кэша в файлах, для нескольких - Memcached, например
+# YATUBE_MEMCACHED=127.0.0.1:11211. С кэшем в памяти процесса кэш
+# страниц и ETag отключаются, см. posts/caching.py.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+if os.environ.get('YATUBE_MEMCACHED'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ['YATUBE_MEMCACHED'],
     }
+
+# тесты получают свой кэш, см. yatube/testing.py
+TEST_RUNNER = 'yatube.testing.TestRunner'
+
+# Авторы, у которых подписчиков не меньше этого числа, не раскладывают
+# свои записи по лентам подписчиков: их записи подмешиваются при чтении.
+# К раскладке автор возвращается, только когда подписчиков становится
+# меньше TIMELINE_FANOUT_RESUME, чтобы подписка и отписка у порога
+# не перекладывали ленты каждый раз. Записи, вышедшие без раскладки,
+# раскладываются в TIMELINE_WORKERS потоках; 0 - сразу после коммита
+# в текущем потоке.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_FANOUT_RESUME = 900
+TIMELINE_WORKERS = 1
+
+# Страницы для анонимных посетителей сбрасываются по тегам при изменении
+# данных во всех процессах сразу (кэш общий), срок жизни лишь ограничивает
+# размер кэша.
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Потоки, создающие миниатюры загруженных картинок в фоне;
+# 0 - создавать сразу после коммита в текущем потоке.
+THUMBNAIL_WORKERS = 2
+
+# Загружаемые файлы больше UPLOAD_MAX_BYTES отбрасываются при разборе
+# запроса. Картинки записей уменьшаются до POST_IMAGE_MAX_SIDE точек
+# по большей стороне и перекодируются в IMAGE_WORKERS процессах;
+# 0 - в процессе сервера.
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_SIDE = 2048
+IMAGE_WORKERS = 2
+FILE_UPLOAD_HANDLERS = [
+    'posts.images.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Комментариев на странице записи, остальные открываются ссылкой «Ещё».
+COMMENTS_PER_PAGE = 50
+
+# Записей в лентах Atom и RSS.
+FEED_SIZE = 50
+
+# Объектов на странице ответа API по умолчанию и наибольшее число,
+# которое клиент может запросить параметром limit.
+API_PAGE_SIZE = 10
+API_MAX_PAGE_SIZE = 100
+
+# Популярные записи: вклад событий в рейтинг записи затухает вдвое
+# за TRENDING_HALF_LIFE секунд, подписка на автора поднимает его записи
+# не старше TRENDING_FOLLOW_WINDOW секунд. Показывается TRENDING_SIZE
+# лучших записей.
+TRENDING_HALF_LIFE = 60 * 60 * 24
+TRENDING_FOLLOW_WINDOW = 60 * 60 * 24 * 3
+TRENDING_SIZE = 100
+
+# Подсказки «на кого подписаться»: сколько хранится для пользователя
+# и сколько показывается на странице. Через авторов больше чем
+# с SUGGESTIONS_MAX_FOLLOWERS подписчиками похожие читатели не ищутся.
+SUGGESTIONS_SIZE = 20
+SUGGESTIONS_SHOWN = 5
+SUGGESTIONS_MAX_FOLLOWERS = 1000
+
+# Доля запросов, для которых собираются метрики yatube.metrics.
+METRICS_SAMPLE_RATE = 0.1
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'metrics': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': os.path.join(BASE_DIR, 'metrics.log'),
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.metrics': {
+            'handlers': ['metrics'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
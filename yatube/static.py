@@ -0,0 +1,172 @@
+"""Статика с хэшем содержимого в именах и сжатыми копиями.
+
+collectstatic записывает рядом с каждым текстовым файлом копии,
+сжатые gzip (`.gz`) и brotli (`.br`, если установлен пакет brotli).
+Копия сохраняется, только если она меньше исходного файла.
+Представление `serve` отдаёт сжатую копию клиенту, который её принимает,
+а файлы с хэшем в имени - с кэшированием на год: при изменении
+содержимого у файла будет другое имя.
+"""
+import gzip
+import mimetypes
+import posixpath
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.json', '.svg', '.txt', '.xml', '.html',
+    '.ico', '.eot', '.otf', '.ttf',
+)
+# сжатие файлов меньше этого размера не окупается
+MIN_SIZE = 256
+# кодировки в порядке предпочтения и суффиксы их копий
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def _gzip(content):
+    # mtime=0: одинаковые файлы дают одинаковые копии
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def _brotli(content):
+    return brotli.compress(content, quality=11)
+
+
+def compressors():
+    """Суффиксы сжатых копий и функции сжатия."""
+    result = [('.gz', _gzip)]
+    if brotli is not None:
+        result.insert(0, ('.br', _brotli))
+    return result
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который сохраняет и сжатые копии."""
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic не запускался или файла нет среди собранных:
+            # ссылка остаётся без хэша, страница всё равно отдаётся
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        self._hashed_names = None
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not name.lower().endswith(COMPRESSIBLE):
+                continue
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        """Сохраняет сжатые копии файла, возвращает их имена."""
+        with self.open(name) as file:
+            content = file.read()
+        saved = []
+        for suffix, compress in compressors():
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            if len(content) < MIN_SIZE:
+                continue
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                self._save(compressed_name, ContentFile(compressed))
+                saved.append(compressed_name)
+        return saved
+
+    def is_hashed(self, name):
+        """Есть ли в имени файла хэш его содержимого."""
+        if getattr(self, '_hashed_names', None) is None:
+            self._hashed_names = frozenset(self.hashed_files.values())
+        return name in self._hashed_names
+
+
+def _accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым весом."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        quality = params.strip().lower()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+def _choose(fullpath, request):
+    """Файл для ответа и его Content-Encoding."""
+    accepted = _accepted_encodings(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted or '*' in accepted:
+            candidate = fullpath.with_name(fullpath.name + suffix)
+            if candidate.is_file():
+                return candidate, encoding
+    return fullpath, None
+
+
+def _patch_headers(response, name, fullpath):
+    if any(
+        fullpath.with_name(fullpath.name + suffix).is_file()
+        for _, suffix in ENCODINGS
+    ):
+        patch_vary_headers(response, ['Accept-Encoding'])
+    is_hashed = getattr(staticfiles_storage, 'is_hashed', None)
+    if is_hashed is not None and is_hashed(name):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+
+
+def serve(request, path):
+    """Отдаёт файл из STATIC_ROOT, по возможности сжатую копию."""
+    name = posixpath.normpath(path).lstrip('/')
+    # путь за пределы STATIC_ROOT - SuspiciousFileOperation, ответ 400
+    fullpath = Path(safe_join(settings.STATIC_ROOT, name))
+    if not fullpath.is_file():
+        raise Http404(name)
+    served, encoding = _choose(fullpath, request)
+    statobj = served.stat()
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              statobj.st_mtime, statobj.st_size):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(str(fullpath))
+        response = FileResponse(
+            served.open('rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Last-Modified'] = http_date(statobj.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    _patch_headers(response, name, fullpath)
+    return response
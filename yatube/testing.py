@@ -0,0 +1,32 @@
+"""Запуск тестов Django."""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Тесты с кэшем во временном каталоге.
+
+    Кэш в файлах переживает тестовую базу, и страницы, закэшированные
+    прошлым запуском, иначе совпали бы с ключами нового.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_settings = override_settings(CACHES={
+            **settings.CACHES,
+            'default': {
+                **settings.CACHES['default'],
+                'LOCATION': self.cache_dir,
+            },
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
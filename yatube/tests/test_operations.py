@@ -0,0 +1,50 @@
+from django.apps import apps
+from django.db import connection, models
+from django.db.migrations.state import ProjectState
+from django.test import TransactionTestCase
+
+from yatube.operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class IndexOperationsTest(TransactionTestCase):
+    def indexes(self):
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(
+                cursor, 'posts_post'
+            )
+
+    def apply(self, operation, state, backwards=False):
+        new_state = state.clone()
+        operation.state_forwards('posts', new_state)
+        with connection.schema_editor(atomic=False) as editor:
+            if backwards:
+                operation.database_backwards(
+                    'posts', editor, new_state, state
+                )
+            else:
+                operation.database_forwards(
+                    'posts', editor, state, new_state
+                )
+        return new_state
+
+    def test_add_and_remove(self):
+        '''Индекс создаётся и удаляется в обе стороны миграции.'''
+        state = ProjectState.from_apps(apps)
+        add = AddIndexConcurrently(
+            'post', models.Index(fields=['text'], name='post_text_test_idx')
+        )
+        remove = RemoveIndexConcurrently('post', 'post_text_test_idx')
+        added = self.apply(add, state)
+        self.assertIn('post_text_test_idx', self.indexes())
+        removed = self.apply(remove, added)
+        self.assertNotIn('post_text_test_idx', self.indexes())
+        self.apply(remove, added, backwards=True)
+        self.assertIn('post_text_test_idx', self.indexes())
+        self.apply(add, state, backwards=True)
+        self.assertNotIn('post_text_test_idx', self.indexes())
+        self.assertEqual(
+            [index.name for index in removed.models['posts', 'post']
+             .options['indexes']],
+            [index.name for index in state.models['posts', 'post']
+             .options['indexes']],
+        )
@@ -0,0 +1,110 @@
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from yatube.static import brotli
+
+STYLES = ('.card { margin: 0 auto; padding: 1rem; }\n' * 200).encode()
+PIXEL = (
+    b'GIF89a\x01\x00\x01\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,'
+    b'\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+
+class StaticFilesTest(TestCase):
+
+    def setUp(self):
+        self.source = Path(tempfile.mkdtemp())
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        (self.source / 'css').mkdir()
+        (self.source / 'css' / 'site.css').write_bytes(STYLES)
+        (self.source / 'pixel.gif').write_bytes(PIXEL)
+        settings = override_settings(
+            STATIC_ROOT=str(self.root),
+            STATICFILES_DIRS=[str(self.source)],
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.url = Template(
+            "{% load static %}{% static 'css/site.css' %}"
+        ).render(Context())
+
+    def test_hashed_name(self):
+        '''Ссылка на файл ведёт на имя с хэшем содержимого.'''
+        self.assertRegex(self.url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        self.assertEqual(
+            (self.root / self.url[len('/static/'):]).read_bytes(), STYLES
+        )
+
+    def test_compressed_copies(self):
+        '''Рядом с текстовыми файлами лежат сжатые копии.'''
+        hashed = self.root / self.url[len('/static/'):]
+        copy = hashed.with_name(hashed.name + '.gz')
+        self.assertEqual(gzip.decompress(copy.read_bytes()), STYLES)
+        self.assertLess(copy.stat().st_size, len(STYLES))
+        self.assertFalse((self.root / 'pixel.gif.gz').exists())
+
+    @skipUnless(brotli, 'пакет brotli не установлен')
+    def test_brotli(self):
+        '''Клиенту, принимающему brotli, отдаётся копия .br.'''
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip, deflate, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            brotli.decompress(b''.join(response.streaming_content)), STYLES
+        )
+
+    def test_serve_gzip(self):
+        '''Сжатая копия отдаётся с кэшированием на год.'''
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), STYLES
+        )
+
+    def test_serve_identity(self):
+        '''Без Accept-Encoding и с нулевым весом файл не сжимается.'''
+        for header in ('', 'gzip;q=0, br;q=0'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.url, HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(
+                    b''.join(response.streaming_content), STYLES
+                )
+
+    def test_unhashed_not_cached(self):
+        '''Файл без хэша в имени не кэшируется надолго.'''
+        response = self.client.get('/static/css/site.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_missing(self):
+        '''Ссылка на несобранный файл не ломает страницу.'''
+        url = Template(
+            "{% load static %}{% static 'missing.css' %}"
+        ).render(Context())
+        self.assertEqual(url, '/static/missing.css')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/static/../settings.py')
+        self.assertEqual(response.status_code, 400)
@@ -4,6 +4,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from yatube import static as static_files
+
 handler404 = 'posts.views.page_not_found'
 handler500 = 'posts.views.server_error'
 
@@ -11,8 +13,13 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('adminsite/', admin.site.urls),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
+    # собранная статика со сжатыми копиями и кэшированием
+    path(
+        f'{settings.STATIC_URL.lstrip("/")}<path:path>', static_files.serve,
+    ),
 ]
 
 if settings.DEBUG:
@@ -20,7 +27,4 @@ if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )
-    urlpatterns += static(
-        settings.STATIC_URL, document_root=settings.STATIC_ROOT
-    )
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)